@@ -0,0 +1,181 @@
+"""HTTP/JSON API for research runs, without the Gradio UI.
+
+    uvicorn api:app --port 8000     (or: python api.py)
+
+    POST /research               {"query": ..., "answers": [...], "email": ...}; returns 202 with the run's id
+    GET  /research/<id>          status, progress messages, the report once done and the run's metrics
+    GET  /research/<id>/events   server-sent events: queue, status, report_reset, report_delta, done, error
+    POST /research/<id>/retry    run a failed run again from its last completed stage
+    GET  /metrics                Prometheus metrics
+    GET  /health
+
+Runs are limited per client only when API_CLIENT_HEADER names the header that identifies clients, e.g.
+X-Forwarded-For behind a load balancer or X-API-Key; the TCP peer alone would be the load balancer.
+
+A plain ASGI app that imports only the standard library and python-dotenv at startup. The research
+pipeline, the Agents SDK and the agents are imported on the first request that needs them, so a
+container starts and passes health checks quickly.
+"""
+import asyncio
+import json
+import os
+
+from dotenv import load_dotenv
+
+# Loaded before the agents are imported, since they read their model routes from the environment
+load_dotenv(override=True)
+
+API_HOST = "127.0.0.1"
+API_PORT = 8000
+MAX_BODY_BYTES = 64 * 1024
+SSE_KEEPALIVE_SECONDS = 15.0
+
+_jobs = None
+
+
+def get_jobs():
+    """Import the research pipeline and create the job runner on first use"""
+    global _jobs
+    if _jobs is None:
+        from research_agents.jobs import ResearchJobs
+        _jobs = ResearchJobs()
+    return _jobs
+
+
+def client_id(scope) -> str:
+    """The client a run counts against, or "" when API_CLIENT_HEADER is not set"""
+    header = os.environ.get("API_CLIENT_HEADER", "").strip().lower()
+    if not header:
+        return ""
+    value = dict(scope.get("headers") or []).get(header.encode("latin-1"), b"").decode("latin-1")
+    if header == "x-forwarded-for":
+        # The last address is the one added by the nearest proxy; earlier ones are up to the client
+        value = value.split(",")[-1]
+    return value.strip() or (scope.get("client") or ("unknown",))[0]
+
+
+async def read_json(receive) -> dict:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large.")
+        if not message.get("more_body"):
+            break
+    try:
+        data = json.loads(body or b"{}")
+    except json.JSONDecodeError:
+        raise ValueError("Request body must be JSON.")
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object.")
+    return data
+
+
+async def send_response(send, status: int, body: bytes, content_type: bytes = b"application/json") -> None:
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, status: int, data: dict) -> None:
+    await send_response(send, status, json.dumps(data).encode("utf-8"))
+
+
+async def stream_events(receive, send, job, last_event_id: int) -> None:
+    """Replay the job's events after last_event_id as server-sent events, then follow it until it finishes"""
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")]})
+
+    async def wait_for_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    disconnected = asyncio.create_task(wait_for_disconnect())
+    seen = last_event_id
+    try:
+        while not disconnected.done():
+            while seen < len(job.events):
+                event = job.events[seen]
+                seen += 1
+                message = f"id: {seen}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n"
+                await send({"type": "http.response.body", "body": message.encode("utf-8"), "more_body": True})
+            if job.finished:
+                break
+            waiter = asyncio.create_task(job.wait_for_events(seen, SSE_KEEPALIVE_SECONDS))
+            await asyncio.wait({waiter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if waiter.done() and not waiter.result():
+                await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+            waiter.cancel()
+        if not disconnected.done():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        disconnected.cancel()
+
+
+async def lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    method = scope["method"]
+    parts = [part for part in scope["path"].split("/") if part]
+    try:
+        if parts == ["health"] and method == "GET":
+            await send_json(send, 200, {"status": "ok", "pipeline_loaded": _jobs is not None})
+        elif parts == ["metrics"] and method == "GET":
+            from research_agents.metrics import get_metrics
+            await send_response(send, 200, get_metrics().prometheus().encode("utf-8"), b"text/plain; version=0.0.4")
+        elif parts == ["research"] and method == "POST":
+            data = await read_json(receive)
+            answers = data.get("answers") or []
+            if not isinstance(answers, list):
+                raise ValueError("answers must be a list of strings.")
+            job = get_jobs().submit(str(data.get("query") or ""), [str(a) for a in answers], str(data.get("email") or ""),
+                                    client=client_id(scope))
+            await send_json(send, 202, {"id": job.id, "status": job.status,
+                                        "poll": f"/research/{job.id}", "events": f"/research/{job.id}/events"})
+        elif len(parts) in (2, 3) and parts[0] == "research":
+            job = _jobs.get(parts[1]) if _jobs is not None else None
+            if job is None:
+                await send_json(send, 404, {"error": f"Unknown research run {parts[1]}"})
+            elif len(parts) == 2 and method == "GET":
+                await send_json(send, 200, job.summary())
+            elif parts[2:] == ["events"] and method == "GET":
+                headers = dict(scope.get("headers") or [])
+                last_event_id = headers.get(b"last-event-id", b"0").decode()
+                await stream_events(receive, send, job, int(last_event_id) if last_event_id.isdigit() else 0)
+            elif parts[2:] == ["retry"] and method == "POST" and job.status != "failed":
+                await send_json(send, 409, {"error": f"Only failed runs can be retried, this one is {job.status}."})
+            elif parts[2:] == ["retry"] and method == "POST":
+                get_jobs().retry(job)
+                await send_json(send, 202, {"id": job.id, "status": job.status})
+            else:
+                await send_json(send, 404, {"error": "Not found"})
+        else:
+            await send_json(send, 404, {"error": "Not found"})
+    except ValueError as e:
+        await send_json(send, 400, {"error": str(e)})
+    except Exception as e:
+        # JobRejected lives in the lazily imported scheduler module
+        if type(e).__name__ == "JobRejected":
+            await send_json(send, 503, {"error": str(e)})
+            return
+        raise
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.environ.get("API_HOST", API_HOST), port=int(os.environ.get("API_PORT", API_PORT)))
@@ -1,33 +1,60 @@
 import gradio as gr
-import re
+import json
+import time
 from dotenv import load_dotenv
+
+# Loaded before the agents are imported, since they read their model routes from the environment
+load_dotenv(override=True)
+
 from agents import Runner, trace, gen_trace_id
+from research_agents.checkpoints import RunCheckpoint, get_checkpoint_store
 from research_agents.clarifier import clarifier_agent, ClarifyingQuestions
-from research_agents.research_manager import research_manager
+from research_agents.context import ResearchContext
+from research_agents.email import get_outbox, is_valid_email
+from research_agents.metrics import get_metrics, start_metrics_server
+from research_agents.model_scheduler import default_run_config
+from research_agents.pipeline import refine_query, research_input, stream_research
+from research_agents.report_cache import ReportFlights, get_report_cache, report_cache_key
+from research_agents.scheduler import JobRejected, JobScheduler, QueueStatus
+from research_agents.speculation import SpeculativeSearches
 
-load_dotenv(override=True)
+scheduler = JobScheduler()
+speculations: dict[str, SpeculativeSearches] = {}
+# Run ID and cache key of each session's last failed run, so running the same query again resumes it
+failed_runs: dict[str, tuple[str, str]] = {}
+report_flights = ReportFlights(get_report_cache())
 
 
-def is_valid_email(email: str) -> bool:
-    """Validate email format using a basic regex pattern"""
-    if not email or not email.strip():
-        return False
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email.strip()))
+def render_progress(status_lines: list[str], report_text: str) -> str:
+    """Render stage messages followed by the report written so far"""
+    progress = "\n".join(f"- {line}" for line in status_lines)
+    if report_text:
+        return f"{progress}\n\n---\n\n{report_text}"
+    return progress
 
 
-def refine_query(original_query: str, answers: list[str] | None) -> str:
-    """Refine the query by incorporating clarification answers"""
-    if not answers or len(answers) == 0:
-        return original_query
-    
-    answers_text = "\n".join([f"- {answer}" for answer in answers if answer and answer.strip()])
-    if answers_text:
-        return f"{original_query}\n\nAdditional context from clarification:\n{answers_text}"
-    return original_query
+def start_speculation(session_id: str, query: str) -> None:
+    """Start planning and searching the original query while the user answers the clarifying questions"""
+    stale = speculations.pop(session_id, None)
+    if stale is not None:
+        stale.cancel()
+    speculation = SpeculativeSearches(query.strip(), ResearchContext())
+    speculation.start()
+    speculations[session_id] = speculation
+
 
+def take_speculation(session_id: str, query: str) -> ResearchContext:
+    """Return the context of the session's speculative searches for this query, or a fresh context"""
+    speculation = speculations.pop(session_id, None)
+    if speculation is not None and speculation.matches(query):
+        speculation.context.speculation = speculation
+        return speculation.context
+    if speculation is not None:
+        speculation.cancel()
+    return ResearchContext()
 
-async def get_questions(query: str, state):
+
+async def get_questions(query: str, state, request: gr.Request):
     """Get clarifying questions for the query"""
     if not query or not query.strip():
         yield "Please enter a research query first.", state
@@ -39,18 +66,20 @@ async def get_questions(query: str, state):
             result = await Runner.run(
                 clarifier_agent,
                 f"Research query: {query}",
+                run_config=default_run_config(),
             )
             questions_data = result.final_output_as(ClarifyingQuestions)
             questions_markdown = f"## Clarifying Questions\n\n"
             for i, q in enumerate(questions_data.questions, 1):
                 questions_markdown += f"{i}. {q.question}\n\n"
             questions_markdown += "Please answer these questions to help refine your research query."
+            start_speculation(request.session_hash, query)
             yield questions_markdown, trace_id
     except Exception as e:
         yield f"Error generating questions: {str(e)}", state
 
 
-async def run(query: str, send_email: bool, recipient_email: str, answer1: str, answer2: str, answer3: str, state):
+async def run(query: str, send_email: bool, recipient_email: str, force_refresh: bool, answer1: str, answer2: str, answer3: str, state, request: gr.Request):
     """Run autonomous research with optional clarification answers"""
     if not query or not query.strip():
         yield "Please enter a research query."
@@ -60,13 +89,19 @@ async def run(query: str, send_email: bool, recipient_email: str, answer1: str,
     
     answers = [answer1, answer2, answer3] if (answer1 or answer2 or answer3) else None
     refined_query = refine_query(query, answers)
+    cache_key = report_cache_key(refined_query)
+    # Checkpoints get a run ID of their own, since the trace ID is shared by every run of a clarified session
+    checkpoint_id = gen_trace_id()
+    failed_key, failed_run_id = failed_runs.pop(request.session_hash, (None, None))
+    if failed_key == cache_key:
+        checkpoint_id = failed_run_id
     
     with trace("Research trace", trace_id=trace_id):
         print(f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}")
         print(f"Starting research... This may take a few minutes.")
         yield f"Starting research... This may take a few minutes."
         
-        input_message = f"Research query: {refined_query}\n\nPlease conduct thorough research on this topic. Plan searches, perform them, write a report, evaluate it, and iterate if needed until you have a high-quality, complete report."
+        input_message = research_input(refined_query)
         
         if send_email:
             if not recipient_email or not recipient_email.strip():
@@ -75,27 +110,45 @@ async def run(query: str, send_email: bool, recipient_email: str, answer1: str,
             if not is_valid_email(recipient_email):
                 yield "Error: Please provide a valid email address."
                 return
-            input_message += f"\n\nIMPORTANT: After completing the research and ensuring the report is high quality, hand off to the Email agent to send the final report to {recipient_email}. Include the recipient email in your handoff message."
         
+        context = take_speculation(request.session_hash, query)
+        context.checkpoint = RunCheckpoint(get_checkpoint_store(), checkpoint_id, refined_query)
         try:
-            result = await Runner.run(
-                research_manager,
-                input_message,
-            )
-            
-            final_output = str(result.final_output)
-            
-            if "✅ Email sent successfully" in final_output:
-                parts = final_output.split("✅ Email sent successfully")
-                if len(parts) > 1:
-                    report_part = parts[1].strip()
-                    lines = report_part.split("\n")
-                    if lines and ("to" in lines[0].lower() or "@" in lines[0]):
-                        final_output = "\n".join(lines[1:]).strip()
-                    else:
-                        final_output = report_part
+            status_lines = []
+            report_text = ""
+            final_output = ""
+            cache_note = ""
+            cached = None if force_refresh else report_flights.cache.get(cache_key)
+            if cached is not None:
+                final_output = cached.report
+                cached_at = time.strftime("%Y-%m-%d %H:%M UTC", time.gmtime(cached.created_at))
+                cache_note = f"\n\n---\n\n*Cached report as of {cached_at}. Tick \"Refresh cached report\" to research it again.*"
+                print(f"Serving cached report from {cached_at}")
             else:
-                final_output = final_output.strip()
+                jobs = report_flights.join(
+                    cache_key, refined_query, request.session_hash,
+                    lambda: scheduler.submit(request.session_hash, lambda: stream_research(input_message, context),
+                                             reserved=True),
+                    admit=lambda: scheduler.reserve(request.session_hash),
+                )
+                async for event in jobs:
+                    if isinstance(event, QueueStatus):
+                        yield f"Waiting for a free research worker: position {event.position} in queue, about {event.eta_seconds / 60:.0f} min"
+                        continue
+                    if event.kind == "done":
+                        final_output = event.text
+                        continue
+                    if event.kind == "status":
+                        status_lines.append(event.text)
+                    elif event.kind == "report_reset":
+                        report_text = ""
+                    elif event.kind == "report_delta":
+                        report_text += event.text
+                    yield render_progress(status_lines, report_text)
+                print(f"Skipped {context.deduplicator.saved} near-duplicate searches")
+                print(f"Run metrics: {json.dumps(get_metrics().run_summary(trace_id))}")
+            
+            final_output = final_output.strip()
             
             if final_output.startswith("```"):
                 lines = final_output.split("\n")
@@ -108,10 +161,33 @@ async def run(query: str, send_email: bool, recipient_email: str, answer1: str,
                 yield "Error: Report not found in output. Please check the trace link for details."
                 return
             
+            if send_email:
+                get_outbox().send_report(recipient_email, final_output)
+            final_output += cache_note
+            if send_email:
+                final_output += f"\n\n---\n\n*The report is being emailed to {recipient_email.strip()}.*"
+            
             yield final_output
             
+        except JobRejected as e:
+            yield str(e)
         except Exception as e:
-            yield f"Error during research: {str(e)}"
+            failed_runs[request.session_hash] = (cache_key, checkpoint_id)
+            yield f"Error during research: {str(e)}\n\nRun the research again to resume from the last completed stage."
+        finally:
+            if context.speculation is not None:
+                context.speculation.cancel()
+
+
+async def cancel_session_runs(request: gr.Request):
+    """Cancel the session's queued or running research when the browser goes away"""
+    # Keep a run going while other sessions with the same query are attached to it
+    cancelled = 0 if report_flights.has_followers(request.session_hash) else scheduler.cancel_session(request.session_hash)
+    speculation = speculations.pop(request.session_hash, None)
+    if speculation is not None:
+        speculation.cancel()
+    if cancelled:
+        print(f"Cancelled {cancelled} research runs for closed session {request.session_hash}")
 
 
 def update_button_state(send_email: bool, recipient_email: str):
@@ -147,6 +223,7 @@ with gr.Blocks(theme=gr.themes.Monochrome()) as ui:
         visible=False,
         placeholder="Enter your email address"
     )
+    refresh_checkbox = gr.Checkbox(label="Refresh cached report", value=False)
     report = gr.Markdown(label="Report")
     
     def handle_checkbox_change(send_email, recipient_email):
@@ -195,13 +272,18 @@ with gr.Blocks(theme=gr.themes.Monochrome()) as ui:
     
     run_button.click(
         fn=run,
-        inputs=[query_textbox, send_email_checkbox, recipient_email_textbox, answer1_textbox, answer2_textbox, answer3_textbox, trace_state],
+        inputs=[query_textbox, send_email_checkbox, recipient_email_textbox, refresh_checkbox, answer1_textbox, answer2_textbox, answer3_textbox, trace_state],
         outputs=report
     )
     query_textbox.submit(
         fn=run,
-        inputs=[query_textbox, send_email_checkbox, recipient_email_textbox, answer1_textbox, answer2_textbox, answer3_textbox, trace_state],
+        inputs=[query_textbox, send_email_checkbox, recipient_email_textbox, refresh_checkbox, answer1_textbox, answer2_textbox, answer3_textbox, trace_state],
         outputs=report
     )
 
-ui.launch(inbrowser=True)
+    ui.unload(cancel_session_runs)
+
+if __name__ == "__main__":
+    start_metrics_server(get_metrics())
+    ui.queue(default_concurrency_limit=None)
+    ui.launch(inbrowser=True)
@@ -0,0 +1,179 @@
+"""Run research queries from a JSONL file without the web UI.
+
+    python batch.py queries.jsonl --output-dir reports --concurrency 2
+
+Each line is a JSON object with a "query" (or a "title" and "body", like requests.jsonl), an optional
+"id", optional clarification "answers" and an optional "email" to send the report to. Every finished
+report is written to <output-dir>/<id>.json as ReportData and a line is appended to
+<output-dir>/manifest.jsonl. Rerunning the same batch skips items the manifest records as done, so an
+interrupted batch resumes where it stopped. Failed items are run again and resume from their last
+completed stage.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from dotenv import load_dotenv
+
+# Loaded before the agents are imported, since they read their model routes from the environment
+load_dotenv(override=True)
+
+from agents import trace, gen_trace_id
+from research_agents.checkpoints import RunCheckpoint, get_checkpoint_store
+from research_agents.context import ResearchContext
+from research_agents.email import get_outbox, is_valid_email
+from research_agents.metrics import get_metrics
+from research_agents.model_scheduler import model_priority
+from research_agents.pipeline import refine_query, research_input, stream_research
+
+DEFAULT_OUTPUT_DIR = "reports"
+DEFAULT_CONCURRENCY = 2
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def item_query(item: dict) -> str:
+    """The research query of a batch item"""
+    if item.get("query"):
+        return str(item["query"]).strip()
+    return "\n\n".join(str(item[k]).strip() for k in ("title", "body") if item.get(k))
+
+
+def item_id(item: dict) -> str:
+    """A file-name-safe id for a batch item, derived from the query and answers when the item has none"""
+    raw = item.get("id") or item.get("request_id")
+    if not raw:
+        payload = json.dumps({"query": item_query(item), "answers": item.get("answers") or []}, sort_keys=True)
+        raw = "item-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", str(raw)).strip("-.") or "item"
+
+
+def load_items(path: str) -> list[dict]:
+    items, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not item_query(item):
+                print(f"Line {line_number}: no query, skipping")
+                continue
+            item["id"] = item_id(item)
+            if item["id"] in seen:
+                print(f"Line {line_number}: duplicate id {item['id']}, skipping")
+                continue
+            seen.add(item["id"])
+            items.append(item)
+    return items
+
+
+def completed_ids(output_dir: str) -> set[str]:
+    """Ids the manifest records as done whose report file is still on disk"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted batch
+                continue
+            if entry.get("status") == "done" and os.path.exists(os.path.join(output_dir, entry.get("path", ""))):
+                done.add(entry["id"])
+    return done
+
+
+def append_manifest(output_dir: str, entry: dict) -> None:
+    with open(os.path.join(output_dir, MANIFEST_NAME), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def write_report(output_dir: str, report_id: str, report) -> str:
+    """Write a ReportData to <id>.json, replacing the file atomically so an interruption never leaves half a report"""
+    name = f"{report_id}.json"
+    path = os.path.join(output_dir, name)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(report.model_dump_json(indent=2))
+    os.replace(path + ".tmp", path)
+    return name
+
+
+async def run_item(item: dict, output_dir: str, semaphore: asyncio.Semaphore) -> bool:
+    """Research one batch item and record the outcome in the manifest"""
+    async with semaphore:
+        query = item_query(item)
+        recipient_email = (item.get("email") or "").strip()
+        trace_id = gen_trace_id()
+        started = time.time()
+        entry = {"id": item["id"], "query": query, "trace_id": trace_id}
+        report = None
+        try:
+            if recipient_email and not is_valid_email(recipient_email):
+                raise ValueError(f"Invalid email address: {recipient_email}")
+            print(f"[{item['id']}] Starting research (trace {trace_id})")
+            with trace("Research trace", trace_id=trace_id):
+                refined_query = refine_query(query, item.get("answers"))
+                input_message = research_input(refined_query)
+                context = ResearchContext()
+                # Keyed by batch and item so rerunning a failed item resumes from its last completed stage
+                checkpoint_id = f"batch:{os.path.abspath(output_dir)}:{item['id']}"
+                context.checkpoint = RunCheckpoint(get_checkpoint_store(), checkpoint_id, refined_query)
+                async for event in stream_research(input_message, context):
+                    if event.kind == "status":
+                        print(f"[{item['id']}] {event.text}")
+                    elif event.kind == "done":
+                        report = event.report
+            if report is None or len(report.markdown_report.strip()) < 50:
+                raise ValueError("Report not found in output")
+            entry.update(status="done", path=write_report(output_dir, item["id"], report))
+            if recipient_email:
+                get_outbox().send_report(recipient_email, report.markdown_report)
+                entry["email"] = recipient_email
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+        summary = get_metrics().run_summary(trace_id) or {}
+        entry.update(seconds=round(time.time() - started, 1), llm_calls=summary.get("llm_calls"),
+                     cost_usd=summary.get("cost_usd"),
+                     finished_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        append_manifest(output_dir, entry)
+        print(f"[{item['id']}] {entry['status']}" + (f": {entry['error']}" if entry["status"] == "failed" else ""))
+        return entry["status"] == "done"
+
+
+async def run_batch(input_path: str, output_dir: str, concurrency: int) -> int:
+    """Run every item not yet completed and return the number that failed"""
+    os.makedirs(output_dir, exist_ok=True)
+    items = load_items(input_path)
+    done = completed_ids(output_dir)
+    pending = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} items, {len(items) - len(pending)} already done, running {len(pending)} "
+          f"with concurrency {concurrency}")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # Batch runs yield model capacity to interactive runs sharing the same rate limits
+    model_priority.set("batch")
+    results = await asyncio.gather(*(run_item(item, output_dir, semaphore) for item in pending))
+    await get_outbox().drain()
+    failed = results.count(False)
+    print(f"Finished: {len(results) - failed} done, {failed} failed. Manifest: {os.path.join(output_dir, MANIFEST_NAME)}")
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Number of research runs at once")
+    args = parser.parse_args()
+    failed = asyncio.run(run_batch(args.input, args.output_dir, args.concurrency))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measure how long each entry point takes to import and how much memory it holds afterwards.
+
+    python -m benchmarks.cold_start [--repeat 5] [--output cold_start.json]
+
+Each measurement runs in a fresh interpreter, so nothing is shared between entry points: "app" is the
+Gradio UI, "api" the ASGI API as it starts up, and "api + pipeline" the API after its first submitted
+run has imported the research pipeline.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "app": "import app",
+    "api": "import api",
+    "api + pipeline": "import api; api.get_jobs()",
+}
+
+PROBE = """
+import resource, sys, time
+started = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - started
+print(seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, len(sys.modules))
+"""
+
+
+def measure(statement: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", PROBE.format(statement=statement)], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout.split()
+    seconds, memory_mb, modules = output[-3:]
+    return {"seconds": float(seconds), "max_rss_mb": float(memory_mb), "modules": int(modules)}
+
+
+def main(args: argparse.Namespace) -> dict:
+    results = {}
+    for name, statement in ENTRY_POINTS.items():
+        samples = [measure(statement) for _ in range(args.repeat)]
+        results[name] = {
+            "median_seconds": round(statistics.median(s["seconds"] for s in samples), 3),
+            "median_max_rss_mb": round(statistics.median(s["max_rss_mb"] for s in samples), 1),
+            "modules": samples[-1]["modules"],
+        }
+        print(f"{name:>16}: {results[name]['median_seconds']:.3f}s, {results[name]['median_max_rss_mb']:.1f} MB, "
+              f"{results[name]['modules']} modules")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument("--output", help="Write the results as JSON")
+    main(parser.parse_args())
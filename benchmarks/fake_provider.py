@@ -0,0 +1,305 @@
+"""Simulated model provider for running the research agents offline.
+
+Every agent keeps its real instructions, tools and output types; only the model is replaced.
+Responses are generated from a Scenario (scripted evaluator scores per round of search coverage) with
+latencies drawn from per-agent log-normal distributions and configurable output sizes.
+The hosted WebSearchTool never runs: the search agent's simulated latency includes the
+simulated web search.
+"""
+import asyncio
+import itertools
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_output_text import AnnotationURLCitation
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+from agents import Model, ModelProvider, ModelResponse, Usage
+from agents.tracing import response_span
+
+from research_agents import clarifier, evaluator, optimizer, planner, research_manager, reviser, search, writer
+
+# Median seconds and log-normal sigma of one model call, per agent
+DEFAULT_LATENCIES = {
+    "manager": (1.0, 0.3),
+    "clarifier": (1.5, 0.3),
+    "planner": (2.0, 0.3),
+    "search": (6.0, 0.4),
+    "writer": (25.0, 0.3),
+    "reviser": (10.0, 0.3),
+    "evaluator": (4.0, 0.3),
+    "optimizer": (1.5, 0.3),
+}
+
+# Approximate number of words each agent produces
+DEFAULT_OUTPUT_WORDS = {
+    "search": 250,
+    "writer": 1200,
+    "reviser_section": 200,
+}
+
+AGENT_INSTRUCTIONS = {
+    "manager": research_manager.INSTRUCTIONS,
+    "clarifier": clarifier.INSTRUCTIONS,
+    "planner": planner.INSTRUCTIONS,
+    "search": search.INSTRUCTIONS,
+    "writer": writer.INSTRUCTIONS,
+    "reviser": reviser.INSTRUCTIONS,
+    "evaluator": evaluator.INSTRUCTIONS,
+    "optimizer": optimizer.INSTRUCTIONS,
+}
+
+QUALITY_THRESHOLD = 0.8
+TOPICS = ("history economics regulation safety hardware software europe asia america africa pricing "
+          "manufacturing supply demand forecast emissions health education labour finance patents "
+          "startups incumbents benchmarks standards privacy security ethics energy water climate").split()
+FILLER = ("analysis evidence trend market research data growth policy impact adoption cost risk model "
+          "performance study result industry standard approach benefit challenge outlook").split()
+
+
+def identify_agent(system_instructions: str | None) -> str:
+    """Work out which research agent a model call belongs to from its system prompt"""
+    text = system_instructions or ""
+    for name, instructions in AGENT_INSTRUCTIONS.items():
+        if isinstance(instructions, str) and text[:80] == instructions[:80]:
+            return name
+    return "unknown"
+
+
+def estimate_tokens(value: Any) -> int:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class Scenario:
+    """One benchmark query and how the simulated agents should behave for it"""
+    query: str
+    evaluator_scores: list[float] = field(default_factory=lambda: [0.85])
+    # The first plan's size the scores are scripted for; the planner itself plans the suggested number
+    searches: int = 3
+    follow_up_searches: int = 2
+
+
+@dataclass
+class CallRecord:
+    agent: str
+    latency_seconds: float
+    input_tokens: int
+    output_tokens: int
+
+
+class FakeModelProvider(ModelProvider):
+    """Model provider that returns a simulated model for every agent and records every call"""
+
+    def __init__(self, scenario: Scenario, latencies: dict | None = None, output_words: dict | None = None,
+                 time_scale: float = 1.0, seed: int = 0):
+        self.scenario = scenario
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.output_words = {**DEFAULT_OUTPUT_WORDS, **(output_words or {})}
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.calls: list[CallRecord] = []
+        self.evaluations = 0
+        self.round = 0
+        self.searches_run = 0
+        self._topics = iter(self.rng.sample(TOPICS, len(TOPICS)))
+        self._ids = itertools.count()
+
+    def get_model(self, model_name: str | None) -> Model:
+        return FakeModel(self, model_name)
+
+    # Simulated agent behaviour
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choice(FILLER) for _ in range(count))
+
+    def search_query(self) -> str:
+        """A search term on a topic not used before in this run, so deduplication does not merge them"""
+        return f"{next(self._topics)} {next(self._topics)} {self.scenario.query.split()[-1].strip('?')}"
+
+    def coverage_round(self) -> int:
+        """The scripted round whose coverage the searches run so far match.
+
+        Scores are scripted for the scenario's planned searches plus follow_up_searches per round, so
+        a plan with extra searches up front reaches later scores without the evaluate and revise rounds.
+        """
+        extra = self.searches_run - self.scenario.searches
+        return max(0, extra // max(1, self.scenario.follow_up_searches))
+
+    def respond(self, agent: str, input: str | list) -> ResponseOutputMessage | ResponseFunctionToolCall:
+        if agent == "manager":
+            return self.manager_step(input)
+        if agent == "clarifier":
+            return self.message({"questions": [{"question": f"Question {i}?"} for i in range(1, 4)]})
+        if agent == "planner":
+            # Plans the suggested number of searches: the first half essential, the last one optional
+            suggested = re.search(r"Suggested number of searches: (\d+)", _text_of(input))
+            count = int(suggested.group(1)) if suggested else self.scenario.searches
+            searches = [{"reason": f"Covers aspect {i} of the query", "query": self.search_query(),
+                         "priority": "high" if i <= (count + 1) // 2 else "low" if i == count and count > 3 else "medium"}
+                        for i in range(1, count + 1)]
+            return self.message({"searches": searches})
+        if agent == "search":
+            self.searches_run += 1
+            # Cited like the hosted web search tool's results, so sources reach the evidence store
+            summary = self.words(self.output_words["search"])
+            citations = [AnnotationURLCitation(type="url_citation", url=f"https://example.com/{next(self._ids)}",
+                                               title=self.words(4), start_index=0, end_index=len(summary))
+                         for _ in range(2)]
+            return self.message(summary, citations)
+        if agent == "writer":
+            # One section per search summary (headed "### <query>" in the input), written about the query
+            topics = re.findall(r"### (.+)$", _text_of(input), re.MULTILINE) or ["Background"]
+            per_section = self.output_words["writer"] // len(topics)
+            markdown = f"# Report on {self.scenario.query}\n\n" + "\n\n".join(
+                f"## {topic.title()}\n\n{self.scenario.query} {self.words(per_section)}" for topic in topics
+            )
+            return self.message({"short_summary": self.words(40), "markdown_report": markdown,
+                                 "follow_up_questions": [self.words(6), self.words(6)]})
+        if agent == "reviser":
+            text = _text_of(input)
+            aspects = re.findall(r"^- (missing aspect \d+)$", text, re.MULTILINE) or ["missing aspect"]
+            topics = " ".join(re.findall(r"### (.+)$", text, re.MULTILINE))
+            sections = [{"heading": aspect.title(),
+                         "markdown": f"## {aspect.title()}\n\n{topics} {self.words(self.output_words['reviser_section'])}"}
+                        for aspect in aspects]
+            return self.message({"sections": sections, "short_summary": self.words(40),
+                                 "follow_up_questions": [self.words(6), self.words(6)]})
+        if agent == "evaluator":
+            scores = self.scenario.evaluator_scores
+            score = scores[min(max(self.round, self.coverage_round()), len(scores) - 1)]
+            self.evaluations += 1
+            complete = score >= QUALITY_THRESHOLD
+            missing = [] if complete else [f"missing aspect {self.round + 1}"]
+            suggested = [] if complete else [self.search_query() for _ in range(self.scenario.follow_up_searches)]
+            return self.message({"quality_score": score, "is_complete": complete, "missing_aspects": missing,
+                                 "needs_more_searches": not complete, "suggested_searches": suggested,
+                                 "feedback": self.words(60)})
+        return self.message(self.words(20))
+
+    def manager_step(self, input: str | list) -> ResponseOutputMessage | ResponseFunctionToolCall:
+        """Follow the research manager's workflow based on the tool results so far"""
+        items = input if isinstance(input, list) else []
+        names = {i["call_id"]: i["name"] for i in items if isinstance(i, dict) and i.get("type") == "function_call"}
+        results = [(names.get(i["call_id"], ""), i["output"]) for i in items
+                   if isinstance(i, dict) and i.get("type") == "function_call_output"]
+        reports = [m.group(1) for name, output in results if name in ("write_report", "revise_report")
+                   for m in [re.match(r"(report-\d+)", output)] if m]
+        if not results:
+            return self.tool_call("plan_searches", {"query": self.scenario.query})
+        last, output = results[-1]
+        stop = re.search(r"STOP: .*return (report-\d+) as your final output", output)
+        if stop:
+            return self.message(stop.group(1))
+        if last == "plan_searches":
+            return self.tool_call("perform_searches", {"searches": json.loads(output)["searches"]})
+        if last == "perform_searches":
+            handles = re.findall(r"^- (search-\d+)", output, re.MULTILINE)
+            if reports:
+                evaluation = _evaluation_of([o for n, o in results if n == "evaluate_report"][-1])
+                return self.tool_call("revise_report", {"query": self.scenario.query, "report_handle": reports[-1],
+                                                        "missing_aspects": evaluation["missing_aspects"],
+                                                        "search_handles": handles})
+            return self.tool_call("write_report", {"query": self.scenario.query, "search_handles": handles})
+        if last in ("write_report", "revise_report") and reports:
+            # Evaluation rounds, not evaluator calls, pick the scripted score: the pre-screen may skip calls
+            self.round = sum(1 for name, _ in results if name == "evaluate_report")
+            return self.tool_call("evaluate_report", {"query": self.scenario.query, "report_handle": reports[-1]})
+        if last == "evaluate_report":
+            evaluation = _evaluation_of(output)
+            if evaluation and not evaluation["is_complete"] and evaluation["suggested_searches"]:
+                searches = [{"reason": "Suggested by the evaluation", "query": q, "priority": "high"}
+                            for q in evaluation["suggested_searches"]]
+                return self.tool_call("perform_searches", {"searches": searches})
+        return self.message(reports[-1] if reports else "No report was written.")
+
+    # Response construction
+
+    def message(self, content: Any, annotations: list | None = None) -> ResponseOutputMessage:
+        text = content if isinstance(content, str) else json.dumps(content)
+        return ResponseOutputMessage(
+            id=f"msg_{next(self._ids)}", type="message", role="assistant", status="completed",
+            content=[ResponseOutputText(type="output_text", text=text, annotations=annotations or [])],
+        )
+
+    def tool_call(self, name: str, arguments: dict) -> ResponseFunctionToolCall:
+        return ResponseFunctionToolCall(
+            id=f"fc_{next(self._ids)}", call_id=f"call_{next(self._ids)}", type="function_call",
+            name=name, arguments=json.dumps(arguments), status="completed",
+        )
+
+    async def simulate(self, system_instructions: str | None, input: str | list) -> tuple[Any, Usage]:
+        agent = identify_agent(system_instructions)
+        median, sigma = self.latencies.get(agent, (1.0, 0.3))
+        latency = self.rng.lognormvariate(0, sigma) * median
+        await asyncio.sleep(latency * self.time_scale)
+        item = self.respond(agent, input)
+        input_tokens = estimate_tokens(system_instructions or "") + estimate_tokens(input)
+        output_tokens = estimate_tokens(item.model_dump())
+        self.calls.append(CallRecord(agent, latency, input_tokens, output_tokens))
+        usage = Usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens,
+                      total_tokens=input_tokens + output_tokens)
+        return item, usage
+
+
+class FakeModel(Model):
+    """Simulated model that, like the OpenAI models, records each call in a response span"""
+
+    def __init__(self, provider: FakeModelProvider, model_name: str | None):
+        self.provider = provider
+        self.model_name = model_name or "gpt-4o-mini"
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, *, previous_response_id) -> ModelResponse:
+        with response_span(disabled=tracing.is_disabled()) as span:
+            item, usage = await self.provider.simulate(system_instructions, input)
+            span.span_data.response = self.response(item, usage)
+            return ModelResponse(output=[item], usage=usage, response_id=None)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                              tracing, *, previous_response_id) -> AsyncIterator[Any]:
+        with response_span(disabled=tracing.is_disabled()) as span:
+            item, usage = await self.provider.simulate(system_instructions, input)
+            sequence = itertools.count()
+            if isinstance(item, ResponseOutputMessage):
+                text = item.content[0].text
+                for start in range(0, len(text), 64):
+                    yield ResponseTextDeltaEvent(type="response.output_text.delta", item_id=item.id, output_index=0,
+                                                 content_index=0, delta=text[start:start + 64],
+                                                 sequence_number=next(sequence))
+            response = self.response(item, usage)
+            span.span_data.response = response
+            yield ResponseCompletedEvent(type="response.completed", sequence_number=next(sequence), response=response)
+
+    def response(self, item: Any, usage: Usage) -> Response:
+        response_usage = ResponseUsage(
+            input_tokens=usage.input_tokens, output_tokens=usage.output_tokens, total_tokens=usage.total_tokens,
+            input_tokens_details=InputTokensDetails(cached_tokens=0),
+            output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+        )
+        return Response.model_construct(id=f"resp_{item.id}", model=self.model_name, output=[item], usage=response_usage)
+
+
+def _text_of(input: str | list) -> str:
+    if isinstance(input, str):
+        return input
+    return "\n".join(str(i.get("content", "")) for i in input if isinstance(i, dict))
+
+
+def _evaluation_of(output: str) -> dict | None:
+    try:
+        return json.loads(output.split(": ", 1)[1])
+    except (IndexError, ValueError):
+        return None
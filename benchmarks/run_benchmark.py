@@ -0,0 +1,159 @@
+"""Run the research pipeline offline against the simulated model provider.
+
+    python -m benchmarks.run_benchmark --output bench_output.json
+
+Reports end-to-end latency, LLM calls, tokens per agent, estimated cost, time per stage and iterations to convergence for
+every query in the corpus, as JSON so results can be compared across commits. Latencies are
+simulated seconds: model calls sleep for their sampled latency multiplied by --time-scale,
+and measured wall time is divided by it again. --think-time simulates speculative planning and
+searching while the user answers clarifying questions.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+from agents import RunConfig, gen_trace_id, set_trace_processors
+from research_agents.context import ResearchContext
+from research_agents.metrics import get_metrics
+from research_agents.pipeline import research_input, stream_research
+from research_agents.search_cache import SearchCache
+from research_agents.speculation import SpeculativeSearches
+from .fake_provider import QUALITY_THRESHOLD, FakeModelProvider, Scenario
+
+DEFAULT_CORPUS = "benchmarks/corpus.jsonl"
+DEFAULT_TIME_SCALE = 0.01
+
+
+def load_corpus(path: str) -> list[Scenario]:
+    with open(path, encoding="utf-8") as f:
+        return [Scenario(**json.loads(line)) for line in f if line.strip()]
+
+
+async def run_scenario(scenario: Scenario, time_scale: float, seed: int, cache_dir: str, think_time: float = 0.0) -> dict:
+    """Run one query end to end and collect its measurements.
+
+    With a think time, planning and searching start speculatively that many simulated seconds before the run,
+    as while a user answers clarifying questions; latency is measured from the start of the run.
+    """
+    provider = FakeModelProvider(scenario, time_scale=time_scale, seed=seed)
+    run_id = gen_trace_id()
+    context = ResearchContext(
+        search_cache=SearchCache(cache_dir),
+        bypass_search_cache=True,
+        run_config=RunConfig(model_provider=provider, trace_id=run_id, workflow_name="Benchmark"),
+    )
+    if think_time > 0:
+        context.speculation = SpeculativeSearches(scenario.query, context)
+        context.speculation.start()
+        await asyncio.sleep(think_time * time_scale)
+    started = time.perf_counter()
+    report = ""
+    error = None
+    try:
+        async for event in stream_research(research_input(scenario.query), context):
+            if event.kind == "done":
+                report = event.text
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    elapsed = (time.perf_counter() - started) / time_scale
+
+    tokens_by_agent: dict[str, dict[str, int]] = {}
+    calls_by_agent: dict[str, int] = {}
+    for call in provider.calls:
+        tokens = tokens_by_agent.setdefault(call.agent, {"input_tokens": 0, "output_tokens": 0})
+        tokens["input_tokens"] += call.input_tokens
+        tokens["output_tokens"] += call.output_tokens
+        calls_by_agent[call.agent] = calls_by_agent.get(call.agent, 0) + 1
+    metrics = get_metrics().run_summary(run_id) or {}
+    stage_seconds = {
+        kind: {name: round(stats["seconds"] / time_scale, 2) for name, stats in metrics.get(kind, {}).items()}
+        for kind in ("model", "tool")
+    }
+    return {
+        "query": scenario.query,
+        "scenario": asdict(scenario),
+        "latency_seconds": round(elapsed, 2),
+        "llm_calls": len(provider.calls),
+        "llm_calls_by_agent": calls_by_agent,
+        "tokens_by_agent": tokens_by_agent,
+        "total_tokens": sum(t["input_tokens"] + t["output_tokens"] for t in tokens_by_agent.values()),
+        "cost_usd": metrics.get("cost_usd", 0.0),
+        "stage_seconds": stage_seconds,
+        "iterations": len(context.budget.scores),
+        "llm_evaluations": provider.evaluations,
+        "converged": bool(context.budget.scores) and context.budget.scores[-1] >= QUALITY_THRESHOLD,
+        "report_words": len(report.split()),
+        "error": error,
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    latencies = sorted(r["latency_seconds"] for r in runs)
+    finished = [r for r in runs if r["report_words"] and not r["error"]]
+    return {
+        "runs": len(runs),
+        "finished": len(finished),
+        "latency_p50_seconds": round(statistics.median(latencies), 2),
+        "latency_p95_seconds": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2),
+        "mean_llm_calls": round(statistics.mean(r["llm_calls"] for r in runs), 2),
+        "llm_calls_per_finished_report": round(sum(r["llm_calls"] for r in runs) / max(1, len(finished)), 2),
+        "mean_total_tokens": round(statistics.mean(r["total_tokens"] for r in runs)),
+        "mean_cost_usd": round(statistics.mean(r["cost_usd"] for r in runs), 6),
+        "mean_iterations": round(statistics.mean(r["iterations"] for r in runs), 2),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> dict:
+    # Only collect metrics; nothing is exported to the OpenAI tracing backend
+    set_trace_processors([get_metrics()])
+    # Seeds the pre-screen's audit sampling
+    random.seed(args.seed)
+    scenarios = load_corpus(args.corpus)
+    runs = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for repeat in range(args.repeat):
+            for i, scenario in enumerate(scenarios):
+                runs.append(await run_scenario(scenario, args.time_scale, args.seed + repeat * len(scenarios) + i, cache_dir,
+                                               args.think_time))
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_commit(),
+        "config": {"corpus": args.corpus, "time_scale": args.time_scale, "seed": args.seed, "repeat": args.repeat,
+                   "think_time": args.think_time},
+        "summary": summarize(runs),
+        "runs": runs,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the research pipeline")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL file of benchmark scenarios")
+    parser.add_argument("--output", help="Write results JSON here instead of stdout")
+    parser.add_argument("--time-scale", type=float, default=DEFAULT_TIME_SCALE, help="Multiplier applied to simulated latencies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Simulated seconds of speculative planning and searching before each run (0 disables)")
+    parser.add_argument("--repeat", type=int, default=1, help="Run the corpus this many times")
+    args = parser.parse_args()
+    results = asyncio.run(main(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(json.dumps(results["summary"], indent=2))
+    else:
+        sys.stdout.write(output + "\n")
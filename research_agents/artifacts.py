@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+DIGEST_WORDS = 30
+
+
+def make_digest(text: str, words: int = DIGEST_WORDS) -> str:
+    """Shorten text to its first few words"""
+    parts = text.split()
+    if len(parts) <= words:
+        return " ".join(parts)
+    return " ".join(parts[:words]) + " ..."
+
+
+@dataclass
+class Artifact:
+    """A tool output kept out of the research manager's conversation"""
+    handle: str
+    kind: str
+    value: Any
+    digest: str
+    label: str = ""
+    parent: str | None = None
+    changed_sections: list[str] = field(default_factory=list)
+
+
+class ArtifactStore:
+    """Per-run store of search summaries, reports and evaluations, addressed by short handles.
+
+    Tools save their outputs here and hand the research manager only a handle and a digest;
+    downstream tools resolve the handles themselves. Listeners are called with every new artifact,
+    e.g. to checkpoint it.
+    """
+
+    def __init__(self):
+        self._artifacts: dict[str, Artifact] = {}
+        self._counts: dict[str, int] = {}
+        self.listeners: list[Callable[[Artifact], None]] = []
+
+    def put(self, kind: str, value: Any, digest: str, **kwargs) -> Artifact:
+        self._counts[kind] = self._counts.get(kind, 0) + 1
+        artifact = Artifact(handle=f"{kind}-{self._counts[kind]}", kind=kind, value=value, digest=digest, **kwargs)
+        self._artifacts[artifact.handle] = artifact
+        for listener in self.listeners:
+            listener(artifact)
+        return artifact
+
+    def restore(self, artifact: Artifact) -> None:
+        """Add an artifact from an earlier attempt of the run, keeping its handle"""
+        self._artifacts[artifact.handle] = artifact
+        number = int(artifact.handle.rsplit("-", 1)[1])
+        self._counts[artifact.kind] = max(self._counts.get(artifact.kind, 0), number)
+
+    def get(self, handle: str, kind: str | None = None) -> Artifact:
+        """Resolve a handle, raising KeyError with a helpful message if it is unknown"""
+        artifact = self._artifacts.get(handle.strip())
+        if artifact is None or (kind is not None and artifact.kind != kind):
+            known = ", ".join(h for h, a in self._artifacts.items() if kind is None or a.kind == kind) or "none"
+            raise KeyError(f"Unknown {kind or 'artifact'} handle '{handle}'. Known handles: {known}")
+        return artifact
+
+    def latest(self, kind: str) -> Artifact | None:
+        """Return the most recently stored artifact of a kind"""
+        for artifact in reversed(list(self._artifacts.values())):
+            if artifact.kind == kind:
+                return artifact
+        return None
+
+    def find(self, kind: str, label: str | None = None, parent: str | None = None) -> Artifact | None:
+        """Return the most recent artifact of a kind with the given label and/or parent"""
+        for artifact in reversed(list(self._artifacts.values())):
+            if artifact.kind != kind:
+                continue
+            if label is not None and artifact.label != label:
+                continue
+            if parent is not None and artifact.parent != parent:
+                continue
+            return artifact
+        return None
+
+    def all(self, kind: str) -> list[Artifact]:
+        return [a for a in self._artifacts.values() if a.kind == kind]
@@ -0,0 +1,121 @@
+import time
+from typing import Any
+
+from .artifacts import Artifact, ArtifactStore
+
+MAX_RUN_SECONDS = 600.0
+MAX_RUN_TOKENS = 400_000
+MAX_RUN_SEARCHES = 20
+MAX_ITERATIONS = 4
+MIN_IMPROVEMENT = 0.03
+QUALITY_THRESHOLD = 0.8
+MAX_TURNS = 30
+# Below this share of its time, tokens or searches, a run skips low-priority searches
+LOW_BUDGET_FRACTION = 0.25
+
+
+class BudgetExceeded(Exception):
+    """Raised when a run is stopped by its budget before any report was written"""
+
+
+def best_report(artifacts: ArtifactStore) -> Artifact | None:
+    """Return the evaluated report with the highest quality score, or the latest report if none was evaluated"""
+    best, best_score = None, -1.0
+    for evaluation in artifacts.all("evaluation"):
+        if evaluation.value.quality_score > best_score:
+            best, best_score = evaluation.parent, evaluation.value.quality_score
+    if best is not None:
+        return artifacts.get(best, "report")
+    return artifacts.latest("report")
+
+
+class RunBudget:
+    """Per-run limits on wall time, tokens, searches and evaluation rounds, plus convergence detection.
+
+    Tools check the budget before starting more work and tell the research manager to stop and return
+    the best report so far once it is used up. stream_research enforces the wall time and turn limits
+    itself, so a run that ignores the instruction still ends on time.
+    """
+
+    def __init__(self, max_seconds: float = MAX_RUN_SECONDS, max_tokens: int = MAX_RUN_TOKENS,
+                 max_searches: int = MAX_RUN_SEARCHES, max_iterations: int = MAX_ITERATIONS,
+                 min_improvement: float = MIN_IMPROVEMENT, quality_threshold: float = QUALITY_THRESHOLD,
+                 max_turns: int = MAX_TURNS):
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.max_searches = max_searches
+        self.max_iterations = max_iterations
+        self.min_improvement = min_improvement
+        self.quality_threshold = quality_threshold
+        self.max_turns = max_turns
+        self.started_at = time.monotonic()
+        self.nested_tokens = 0
+        self.searches = 0
+        self.scores: list[float] = []
+        self._last_comparable_score: float | None = None
+        self.stop_reason: str | None = None
+        # Set once the run hits its time, token or turn limit, as opposed to ending its evaluation loop
+        self.limit_reason: str | None = None
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+
+    def remaining_seconds(self) -> float:
+        return self.max_seconds - (time.monotonic() - self.started_at)
+
+    def remaining_searches(self) -> int:
+        return max(0, self.max_searches - self.searches)
+
+    def running_short(self, manager_tokens: int = 0) -> bool:
+        """Whether less than LOW_BUDGET_FRACTION of the run's time, tokens or searches is left"""
+        tokens = self.nested_tokens + manager_tokens
+        return (self.remaining_seconds() < self.max_seconds * LOW_BUDGET_FRACTION
+                or self.max_tokens - tokens < self.max_tokens * LOW_BUDGET_FRACTION
+                or self.remaining_searches() < self.max_searches * LOW_BUDGET_FRACTION)
+
+    def add_usage(self, result: Any) -> None:
+        """Count the tokens of a sub-agent run started by a tool"""
+        self.nested_tokens += sum(response.usage.total_tokens for response in result.raw_responses)
+
+    def exhausted(self, manager_tokens: int = 0) -> str | None:
+        """Why the run should stop, or None if it may continue.
+
+        manager_tokens is the research manager's own usage so far, from its RunContextWrapper.
+        """
+        if self.stop_reason:
+            return self.stop_reason
+        tokens = self.nested_tokens + manager_tokens
+        if self.remaining_seconds() <= 0:
+            self.limit_reason = f"time budget of {self.max_seconds:.0f}s used up"
+        elif tokens >= self.max_tokens:
+            self.limit_reason = f"token budget of {self.max_tokens} used up ({tokens} tokens)"
+        else:
+            return None
+        return self.limit_reason
+
+    def record_evaluation(self, quality_score: float, is_complete: bool, comparable: bool = True) -> str | None:
+        """Record an evaluation round and decide whether the research loop should stop.
+
+        Scores not on the evaluator's scale (comparable=False, e.g. the pre-screen's synthesized failures)
+        count as a round but are left out of the convergence check.
+        """
+        previous = self._last_comparable_score
+        self.scores.append(quality_score)
+        if comparable:
+            self._last_comparable_score = quality_score
+        if quality_score >= self.quality_threshold and is_complete:
+            self.stop_reason = "quality threshold reached"
+        elif len(self.scores) >= self.max_iterations:
+            self.stop_reason = f"iteration budget of {self.max_iterations} evaluations used up"
+        elif comparable and previous is not None and quality_score - previous < self.min_improvement:
+            self.stop_reason = (f"converged: quality score changed by {quality_score - previous:+.2f}, "
+                                f"less than {self.min_improvement:.2f}")
+        return self.stop_reason
+
+
+def stop_message(reason: str, artifacts: ArtifactStore) -> str:
+    """Tell the research manager to stop and which report to finish with"""
+    report = best_report(artifacts)
+    if report is None:
+        return f"STOP: {reason}. Write the report now with write_report from the searches collected so far."
+    return f"STOP: {reason}. Do not search, write or revise any further; return {report.handle} as your final output."
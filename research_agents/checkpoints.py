@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from pydantic import ValidationError
+
+from .artifacts import Artifact
+from .evaluator import EvaluationResult
+from .planner import WebSearchPlan
+from .prescreen import is_synthesized_failure
+from .search_cache import SEARCH_CACHE_DIR, normalize_query
+from .writer import ReportData
+
+if TYPE_CHECKING:
+    from .context import ResearchContext
+
+CHECKPOINT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+_ARTIFACT_TYPES = {"report": ReportData, "evaluation": EvaluationResult}
+
+
+class CheckpointStore:
+    """SQLite-backed store of the stages a research run has completed, keyed by run ID.
+
+    Each record is one completed stage: the search plan, a search summary, or a search, report or
+    evaluation artifact. Records older than the TTL are pruned when the store is opened.
+    """
+
+    def __init__(self, directory: str | None = None, ttl_seconds: float = CHECKPOINT_TTL_SECONDS):
+        directory = directory or os.environ.get("CHECKPOINT_DIR", SEARCH_CACHE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "checkpoints.sqlite3"), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "run_id TEXT NOT NULL, name TEXT NOT NULL, record TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (run_id, name))"
+            )
+            self._conn.execute("DELETE FROM checkpoints WHERE created_at < ?", (time.time() - ttl_seconds,))
+
+    def save(self, run_id: str, name: str, record: dict) -> None:
+        """Store a completed stage, replacing an earlier record with the same name"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, name, record, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, name, json.dumps(record), time.time()),
+            )
+
+    def load(self, run_id: str) -> dict[str, dict]:
+        """Return a run's records by name, in the order they were saved"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, record FROM checkpoints WHERE run_id = ? ORDER BY rowid", (run_id,)
+            ).fetchall()
+        return {name: json.loads(record) for name, record in rows}
+
+    def delete(self, run_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+
+
+class RunCheckpoint:
+    """Checkpoints one research run so a retry with the same run ID resumes from its last completed stage.
+
+    attach() restores the stages saved by earlier attempts into a fresh context and saves every new
+    stage from then on: plan_searches reuses the saved plan, run_searches reuses saved search summaries,
+    and the research manager is told which reports and evaluations already exist. Records are tagged
+    with the run's query, and only those saved for the same query are restored.
+    """
+
+    def __init__(self, store: CheckpointStore, run_id: str, query: str):
+        self.store = store
+        self.run_id = run_id
+        self.key = normalize_query(query)
+        self._records: dict[str, dict] = {}
+
+    def attach(self, context: "ResearchContext") -> str | None:
+        """Restore saved stages into the context and start saving new ones.
+
+        Returns a note for the research manager describing the completed stages, or None if there are none.
+        """
+        saved = self.store.load(self.run_id)
+        self._records = {name: record for name, record in saved.items() if record.get("key") == self.key}
+        if len(self._records) < len(saved):
+            # Saved for another query under the same run ID: none of it applies to this run
+            self.store.delete(self.run_id)
+            for name, record in self._records.items():
+                self.store.save(self.run_id, name, record)
+        budget = context.budget
+        artifacts = []
+        for name, record in self._records.items():
+            if not name.startswith("artifact:"):
+                continue
+            value_type = _ARTIFACT_TYPES.get(record["kind"])
+            value = value_type.model_validate(record["value"]) if value_type else record["value"]
+            artifact = Artifact(handle=record["handle"], kind=record["kind"], value=value, digest=record["digest"],
+                                label=record["label"], parent=record["parent"],
+                                changed_sections=record["changed_sections"])
+            context.artifacts.restore(artifact)
+            artifacts.append(artifact)
+            if artifact.kind == "search":
+                # Searching the same query again is skipped as a near-duplicate pointing at this handle
+                context.deduplicator.remember(artifact.label)
+                context.evidence.add(artifact.handle, artifact.label, artifact.value)
+                budget.searches += 1
+            elif artifact.kind == "evaluation":
+                budget.record_evaluation(value.quality_score, value.is_complete, not is_synthesized_failure(value))
+        context.artifacts.listeners.append(self.save_artifact)
+        return self._resume_note(artifacts) if self._records else None
+
+    def plan(self, query: str) -> WebSearchPlan | None:
+        """The saved search plan, if it was made for this query"""
+        record = self._records.get("plan")
+        if record is None or normalize_query(record["query"]) != normalize_query(query):
+            return None
+        try:
+            return WebSearchPlan.model_validate(record["plan"])
+        except ValidationError:
+            # Saved before search priorities existed; plan again
+            return None
+
+    def search_summary(self, query: str) -> str | None:
+        """The saved summary of a search that finished in an earlier attempt"""
+        record = self._records.get(f"search:{normalize_query(query)}")
+        return record["summary"] if record else None
+
+    def save_plan(self, query: str, plan: WebSearchPlan) -> None:
+        self._save("plan", {"query": query, "plan": plan.model_dump()})
+
+    def save_search(self, query: str, summary: str) -> None:
+        self._save(f"search:{normalize_query(query)}", {"query": query, "summary": summary})
+
+    def save_artifact(self, artifact: Artifact) -> None:
+        value = artifact.value.model_dump() if hasattr(artifact.value, "model_dump") else artifact.value
+        self._save(f"artifact:{artifact.handle}", {
+            "handle": artifact.handle, "kind": artifact.kind, "value": value, "digest": artifact.digest,
+            "label": artifact.label, "parent": artifact.parent, "changed_sections": artifact.changed_sections,
+        })
+
+    def clear(self) -> None:
+        """Drop the run's checkpoints once it has finished"""
+        self._records = {}
+        self.store.delete(self.run_id)
+
+    def _save(self, name: str, record: dict) -> None:
+        record = {**record, "key": self.key}
+        self._records[name] = record
+        self.store.save(self.run_id, name, record)
+
+    def _resume_note(self, artifacts: list[Artifact]) -> str:
+        lines = ["This run is resuming after an interruption. These stages were already completed; continue from "
+                 "the next stage and do not repeat them:"]
+        plan = self._records.get("plan")
+        if plan is not None:
+            lines.append(f"- Search plan with {len(plan['plan']['searches'])} searches (plan_searches returns it again)")
+        searched = {normalize_query(a.label) for a in artifacts if a.kind == "search"}
+        pending = [r["query"] for name, r in self._records.items()
+                   if name.startswith("search:") and normalize_query(r["query"]) not in searched]
+        if pending:
+            lines.append(f"- {len(pending)} searches finished but were not handed over yet; perform_searches "
+                         "returns their saved summaries")
+        for artifact in artifacts:
+            if artifact.kind == "search":
+                lines.append(f"- {artifact.handle} \"{artifact.label}\": {artifact.digest}")
+            elif artifact.kind == "report":
+                revision = f" (revision of {artifact.parent})" if artifact.parent else ""
+                lines.append(f"- {artifact.handle}{revision}: {artifact.digest}")
+            else:
+                evaluation: EvaluationResult = artifact.value
+                lines.append(f"- Evaluation of {artifact.parent}: "
+                             f"{evaluation.model_dump_json(exclude={'feedback'})}")
+        return "\n".join(lines)
+
+
+_checkpoint_store: CheckpointStore | None = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Return the process-wide checkpoint store, creating it on first use"""
+    global _checkpoint_store
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            _checkpoint_store = CheckpointStore()
+        return _checkpoint_store
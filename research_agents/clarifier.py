@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from agents import Agent
+from .models import model_for
 
 INSTRUCTIONS = """You are a helpful research assistant that asks clarifying questions to better understand research queries.
 Given an initial research query, generate exactly 3 clarifying questions that will help refine and focus the research.
@@ -27,7 +28,7 @@ class ClarifyingQuestions(BaseModel):
 clarifier_agent = Agent(
     name="ClarifierAgent",
     instructions=INSTRUCTIONS,
-    model="gpt-4o-mini",
+    model=model_for("clarifier"),
     output_type=ClarifyingQuestions,
 )
 
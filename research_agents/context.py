@@ -0,0 +1,38 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from agents import RunConfig
+from .artifacts import ArtifactStore
+from .budget import RunBudget
+from .dedup import SearchDeduplicator
+from .evidence import EvidenceStore
+from .model_scheduler import default_run_config
+from .prescreen import PrescreenThresholds
+from .progress import ProgressReporter
+from .search_cache import SearchCache
+
+if TYPE_CHECKING:
+    from .checkpoints import RunCheckpoint
+    from .speculation import SpeculativeSearches
+
+MAX_CONCURRENT_SEARCHES = 5
+SEARCH_TIMEOUT_SECONDS = 60.0
+
+
+@dataclass
+class ResearchContext:
+    """Per-run state shared by the research manager and its tools"""
+    max_concurrent_searches: int = MAX_CONCURRENT_SEARCHES
+    search_timeout: float = SEARCH_TIMEOUT_SECONDS
+    bypass_search_cache: bool = False
+    search_cache: SearchCache | None = None
+    deduplicator: SearchDeduplicator = field(default_factory=SearchDeduplicator)
+    progress: ProgressReporter = field(default_factory=ProgressReporter)
+    artifacts: ArtifactStore = field(default_factory=ArtifactStore)
+    evidence: EvidenceStore = field(default_factory=EvidenceStore)
+    budget: RunBudget = field(default_factory=RunBudget)
+    prescreen: PrescreenThresholds | None = field(default_factory=PrescreenThresholds)
+    failed_searches: set[str] = field(default_factory=set)
+    run_config: RunConfig = field(default_factory=default_run_config)
+    speculation: "SpeculativeSearches | None" = None
+    checkpoint: "RunCheckpoint | None" = None
@@ -0,0 +1,89 @@
+import re
+
+from .planner import WebSearchItem
+
+SIMILARITY_THRESHOLD = 0.6
+SHINGLE_SIZE = 3
+# Content words are compared by their first letters without a plural s, so "cars" matches "car" and "batteries" "battery"
+TERM_STEM_LENGTH = 5
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of",
+    "on", "or", "that", "the", "this", "to", "what", "when", "where", "which", "who", "why", "with",
+}
+
+
+def shingles(query: str, size: int = SHINGLE_SIZE) -> set[str]:
+    """Character shingles of each non-stop-word token, so word order and inflections matter little"""
+    tokens = [t for t in re.findall(r"[a-z0-9]+", query.lower()) if t not in STOP_WORDS]
+    result = set()
+    for token in tokens:
+        padded = f"^{token}$"
+        if len(padded) <= size:
+            result.add(padded)
+        else:
+            result.update(padded[i:i + size] for i in range(len(padded) - size + 1))
+    return result
+
+
+def content_terms(query: str) -> set[str]:
+    """Stems of the query's content words"""
+    return {t.rstrip("s")[:TERM_STEM_LENGTH] for t in re.findall(r"[a-z0-9]+", query.lower()) if t not in STOP_WORDS}
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SearchDeduplicator:
+    """Per-run index of executed search queries that filters out near-duplicate searches.
+
+    A search is a near-duplicate of an executed one when their shingles are similar and the executed
+    query covers every content word of the new one. Rephrasings and reorderings are skipped, while
+    refinements that add or swap a word ("... recycling" after "... cost", "... usa" after
+    "... europe") still run.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.saved = 0
+        self._executed: dict[str, set[str]] = {}
+
+    def find_duplicate(self, query: str) -> str | None:
+        """Return the most similar executed query covering this one, if it is at or above the threshold"""
+        query_shingles = shingles(query)
+        query_terms = content_terms(query)
+        best_query, best_score = None, 0.0
+        for executed, executed_shingles in self._executed.items():
+            if not query_terms <= content_terms(executed):
+                continue
+            score = jaccard(query_shingles, executed_shingles)
+            if score > best_score:
+                best_query, best_score = executed, score
+        return best_query if best_score >= self.threshold else None
+
+    def filter(self, searches: list[WebSearchItem]) -> list[str | None]:
+        """Return, for each search, the earlier query it duplicates, or None if it should be run.
+
+        Searches to be run are added to the index immediately so duplicates within one batch are caught too.
+        """
+        duplicates = []
+        for item in searches:
+            duplicate_of = self.find_duplicate(item.query)
+            if duplicate_of is not None:
+                self.saved += 1
+            else:
+                self._executed[item.query] = shingles(item.query)
+            duplicates.append(duplicate_of)
+        return duplicates
+
+    def remember(self, query: str) -> None:
+        """Add a query that already ran, e.g. in an earlier attempt of the run"""
+        self._executed[query] = shingles(query)
+
+    def forget(self, query: str) -> None:
+        """Remove a query from the index, e.g. because its search failed and may be retried"""
+        self._executed.pop(query, None)
@@ -1,56 +1,132 @@
+import asyncio
+import contextvars
 import os
-from typing import Dict
+import random
+import re
+from dataclasses import dataclass
 
-import sendgrid
-from sendgrid.helpers.mail import Email, Mail, Content, To
-from agents import Agent, function_tool
+from .metrics import current_run_id, get_metrics
+from .render import render_email
 
+MAX_ATTEMPTS = 5
+INITIAL_BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 60.0
 
-@function_tool
-def send_email(subject: str, html_body: str, recipient_email: str) -> Dict[str, str]:
-    """Send an email with the given subject and HTML body to the recipient_email address.
-    
-    Args:
-        subject: Email subject line
-        html_body: HTML content of the email
-        recipient_email: Email address to send to
+
+@dataclass
+class OutgoingEmail:
+    recipient_email: str
+    subject: str
+    html_body: str
+    run_id: str | None = None
+
+
+def is_valid_email(email: str) -> bool:
+    """Validate email format using a basic regex pattern"""
+    if not email or not email.strip():
+        return False
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return bool(re.match(pattern, email.strip()))
+
+
+def report_subject(markdown_report: str) -> str:
+    """Use the report's first heading as the subject line"""
+    for line in markdown_report.splitlines():
+        if line.startswith("#"):
+            return f"Research report: {line.lstrip('#').strip()}"
+    return "Your research report"
+
+
+class EmailOutbox:
+    """Delivers emails through SendGrid in the background, retrying failures with exponential backoff.
+
+    SendGrid is only imported and its client created when the first email is sent, and its blocking HTTP
+    calls run in a worker thread.
+    Set SENDGRID_HOST (or pass host) to deliver to a local fake SendGrid endpoint.
     """
-    if not recipient_email or not recipient_email.strip():
-        return {"error": "recipient_email is required"}
-    
-    sg = sendgrid.SendGridAPIClient(api_key=os.environ.get("SENDGRID_API_KEY"))
-    from_email = Email(os.environ.get("EMAIL_FROM"))
-    
-    to_email = To(recipient_email.strip())
-    content = Content("text/html", html_body)
-    
-    mail = Mail(from_email, to_email, subject, content).get()
-    response = sg.client.mail.send.post(request_body=mail)
-    print("Email response", response.status_code)
-    return "success"
-
-
-INSTRUCTIONS = """You are an email agent that sends research reports via email.
-You will receive a research report (in markdown format) and a recipient email address from another agent.
-Your job is to:
-1. Convert the markdown report to clean, well-presented HTML
-2. Create an appropriate subject line for the email
-3. Send the email using your send_email tool - call it ONCE and only ONCE
-4. After successfully sending the email, return BOTH:
-   - A confirmation message that the email was sent
-   - The original markdown report
-
-Format your response as:
-"✅ Email sent successfully to [recipient_email].
-
-[Original markdown report here]"
-
-The recipient email will be provided in the message. Extract it and use it as the recipient_email parameter.
-Call send_email tool only once. Always include the original markdown report in your response after confirming the email was sent."""
-
-email_agent = Agent(
-    name="Email agent",
-    instructions=INSTRUCTIONS,
-    tools=[send_email],
-    model="gpt-4o-mini",
-)
+
+    def __init__(self, api_key: str | None = None, from_email: str | None = None, host: str | None = None,
+                 max_attempts: int = MAX_ATTEMPTS, initial_backoff: float = INITIAL_BACKOFF_SECONDS):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.host = host
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.sent = 0
+        self.failed = 0
+        self._client = None
+        self._queue: asyncio.Queue[OutgoingEmail] | None = None
+        self._worker: asyncio.Task | None = None
+
+    def send(self, recipient_email: str, subject: str, html_body: str, run_id: str | None = None) -> None:
+        """Queue an email for delivery and return immediately; retries are counted against run_id"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            # A fresh context keeps the first sender's trace from leaking into the shared worker. The task
+            # copies the context it is created in, since create_task(context=...) needs Python 3.11
+            self._worker = contextvars.Context().run(asyncio.create_task, self._run())
+        self._queue.put_nowait(OutgoingEmail(recipient_email.strip(), subject, html_body, run_id or current_run_id()))
+
+    def send_report(self, recipient_email: str, markdown_report: str) -> None:
+        """Render a markdown report to HTML and queue it for delivery"""
+        subject = report_subject(markdown_report)
+        self.send(recipient_email, subject, render_email(markdown_report, subject))
+
+    async def drain(self) -> None:
+        """Wait until every queued email has been delivered or given up on"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _run(self) -> None:
+        while True:
+            email = await self._queue.get()
+            try:
+                await self._deliver(email)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, email: OutgoingEmail) -> None:
+        from python_http_client.exceptions import HTTPError
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                status = await asyncio.to_thread(self._post, email)
+                print("Email response", status)
+                self.sent += 1
+                return
+            except HTTPError as e:
+                print(f"Email attempt {attempt} to {email.recipient_email} failed with status {e.status_code}")
+                if e.status_code < 500 and e.status_code != 429:
+                    break
+            except Exception as e:
+                print(f"Email attempt {attempt} to {email.recipient_email} failed: {e}")
+            if attempt < self.max_attempts:
+                backoff = min(MAX_BACKOFF_SECONDS, self.initial_backoff * 2 ** (attempt - 1))
+                await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+                get_metrics().record_retry("email", email.run_id)
+        self.failed += 1
+        print(f"Giving up on email to {email.recipient_email}")
+
+    def _post(self, email: OutgoingEmail) -> int:
+        import sendgrid
+        from sendgrid.helpers.mail import Email, Mail, Content, To
+
+        if self._client is None:
+            host = self.host or os.environ.get("SENDGRID_HOST", "https://api.sendgrid.com")
+            self._client = sendgrid.SendGridAPIClient(api_key=self.api_key or os.environ.get("SENDGRID_API_KEY"), host=host)
+        from_email = Email(self.from_email or os.environ.get("EMAIL_FROM"))
+        content = Content("text/html", email.html_body)
+        mail = Mail(from_email, To(email.recipient_email), email.subject, content).get()
+        response = self._client.client.mail.send.post(request_body=mail)
+        return response.status_code
+
+
+_outbox: EmailOutbox | None = None
+
+
+def get_outbox() -> EmailOutbox:
+    """Return the process-wide email outbox"""
+    global _outbox
+    if _outbox is None:
+        _outbox = EmailOutbox()
+    return _outbox
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from agents import Agent
+from .models import model_for
 
 INSTRUCTIONS = """You are a quality evaluator for research reports. Your job is to assess whether a research report adequately addresses the original query.
 
@@ -38,7 +39,7 @@ class EvaluationResult(BaseModel):
 evaluator_agent = Agent(
     name="EvaluatorAgent",
     instructions=INSTRUCTIONS,
-    model="gpt-4o-mini",
+    model=model_for("evaluator"),
     output_type=EvaluationResult,
 )
 
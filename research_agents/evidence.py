@@ -0,0 +1,149 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .dedup import STOP_WORDS
+from .prescreen import STEM_LENGTH
+
+PASSAGE_WORDS = 100
+PASSAGES_PER_QUERY = 3
+MAX_EVIDENCE_WORDS = 3000
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_URL = re.compile(r"https?://[^\s)\]>\"']+")
+_SOURCES_HEADING = re.compile(r"^\s*\**sources:?\**\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Content words of a text cut to a common stem, keeping repeats for term frequencies"""
+    return [t[:STEM_LENGTH] for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOP_WORDS and len(t) > 2]
+
+
+def split_sources(summary: str) -> tuple[str, list[str]]:
+    """Separate a search summary's trailing "Sources:" list from its text"""
+    match = _SOURCES_HEADING.search(summary)
+    if match is None:
+        return summary, []
+    return summary[:match.start()].rstrip(), list(dict.fromkeys(_URL.findall(summary[match.end():])))
+
+
+def split_passages(text: str, size: int = PASSAGE_WORDS) -> list[str]:
+    """Split text into passages of about size words, at paragraph and then sentence boundaries"""
+    passages, current = [], []
+    for paragraph in re.split(r"\n\s*\n", text):
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph.strip()):
+            words = sentence.split()
+            while words:
+                room = size - len(current)
+                if len(words) > room and current:
+                    passages.append(" ".join(current))
+                    current = []
+                    continue
+                current.extend(words[:size])
+                words = words[size:]
+        # Paragraphs that are long enough on their own start a new passage
+        if len(current) >= size // 2:
+            passages.append(" ".join(current))
+            current = []
+    if current and passages and len(current) < size // 4:
+        # A short remainder would rank too well for its length; keep it with the passage before it
+        passages[-1] += " " + " ".join(current)
+    elif current:
+        passages.append(" ".join(current))
+    return passages
+
+
+@dataclass
+class Passage:
+    """A few sentences of one search summary, with the sources they came from"""
+    search_handle: str
+    topic: str
+    text: str
+    sources: list[str] = field(default_factory=list)
+    terms: Counter = field(default_factory=Counter)
+
+
+class EvidenceStore:
+    """Per-run BM25 index over passages of the search summaries.
+
+    write_report and revise_report retrieve the passages most relevant to the query, each search topic
+    or each missing aspect instead of pasting every summary, so the writer's input stays bounded
+    however many rounds of searching happened. Passages keep their source URLs for citations.
+    """
+
+    def __init__(self, passage_words: int = PASSAGE_WORDS):
+        self.passage_words = passage_words
+        self.passages: list[Passage] = []
+        self._document_frequency: Counter = Counter()
+        self._total_length = 0
+
+    def add(self, search_handle: str, topic: str, summary: str) -> None:
+        text, summary_sources = split_sources(summary)
+        for chunk in split_passages(text, self.passage_words):
+            passage = Passage(search_handle, topic, chunk, _URL.findall(chunk) or summary_sources,
+                              Counter(tokenize(f"{topic} {chunk}")))
+            self.passages.append(passage)
+            self._document_frequency.update(passage.terms.keys())
+            self._total_length += sum(passage.terms.values())
+
+    def search(self, query: str, k: int = PASSAGES_PER_QUERY, handles: set[str] | None = None) -> list[Passage]:
+        """Return the k passages that best match the query, optionally only from some searches"""
+        terms = set(tokenize(query))
+        if not terms or not self.passages:
+            return []
+        count = len(self.passages)
+        average_length = self._total_length / count or 1
+        scored = []
+        for i, passage in enumerate(self.passages):
+            if handles is not None and passage.search_handle not in handles:
+                continue
+            length = sum(passage.terms.values())
+            score = 0.0
+            for term in terms & passage.terms.keys():
+                frequency = self._document_frequency[term]
+                idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+                tf = passage.terms[term]
+                score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+            if score > 0:
+                scored.append((score, -i, passage))
+        scored.sort(key=lambda entry: entry[:2], reverse=True)
+        return [passage for _, _, passage in scored[:k]]
+
+    def retrieve(self, queries: list[str], k: int = PASSAGES_PER_QUERY, handles: set[str] | None = None,
+                 max_words: int = MAX_EVIDENCE_WORDS) -> list[Passage]:
+        """Take the top k passages for each query in turn, without repeats, until max_words is reached"""
+        ranked = [self.search(query, k, handles) for query in queries]
+        selected: list[Passage] = []
+        seen: set[int] = set()
+        words = 0
+        # Round-robin so every query gets its best passages in before any gets its third
+        for rank in range(k):
+            for passages in ranked:
+                if rank >= len(passages) or id(passages[rank]) in seen:
+                    continue
+                length = len(passages[rank].text.split())
+                if words + length > max_words:
+                    return selected
+                selected.append(passages[rank])
+                seen.add(id(passages[rank]))
+                words += length
+        return selected
+
+
+def format_evidence(passages: list[Passage]) -> str:
+    """Group passages under their search topic, with their sources, in the order the searches were run"""
+    if not passages:
+        return "(no relevant passages found)"
+    by_topic: dict[tuple[str, str], list[Passage]] = {}
+    for passage in sorted(passages, key=lambda p: int(p.search_handle.rsplit("-", 1)[1])):
+        by_topic.setdefault((passage.search_handle, passage.topic), []).append(passage)
+    blocks = []
+    for (_, topic), group in by_topic.items():
+        lines = [f"### {topic}"]
+        for passage in group:
+            sources = f" (Sources: {', '.join(passage.sources)})" if passage.sources else ""
+            lines.append(f"- {passage.text}{sources}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
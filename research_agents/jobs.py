@@ -0,0 +1,166 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from agents import gen_trace_id, trace
+from .checkpoints import RunCheckpoint, get_checkpoint_store
+from .context import ResearchContext
+from .email import get_outbox, is_valid_email
+from .metrics import get_metrics
+from .pipeline import refine_query, research_input, stream_research
+from .scheduler import JobScheduler, QueueStatus
+
+MAX_JOBS = 500
+# API runs are counted per client when the API identifies clients; the scheduler's own per-session limit suits one browser tab
+MAX_JOBS_PER_CLIENT = 3
+# Report deltas are kept for replay in chunks of about this many characters rather than one event per token
+REPORT_DELTA_CHARS = 256
+
+
+@dataclass
+class ResearchJob:
+    """A research run submitted through the API, with every event it has produced so far.
+
+    The job ID is also the run's trace ID and checkpoint key. Events are kept so late subscribers
+    can replay the stream from the start. client is empty when the API does not limit runs per client.
+    """
+    id: str
+    query: str
+    answers: list[str] = field(default_factory=list)
+    email: str = ""
+    client: str = ""
+    status: str = "queued"
+    events: list[dict[str, Any]] = field(default_factory=list)
+    report: dict[str, Any] | None = None
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    task: asyncio.Task | None = None
+    _updated: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _pending_delta: str = field(default="", repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    @property
+    def session(self) -> str:
+        """The scheduler session the job counts against: its client, or the job alone if there is none"""
+        return self.client or self.id
+
+    def publish(self, kind: str, **data: Any) -> None:
+        """Record an event and wake its subscribers; report deltas are merged into chunks first"""
+        if kind == "report_delta":
+            self._pending_delta += data["text"]
+            if len(self._pending_delta) < REPORT_DELTA_CHARS:
+                return
+        if self._pending_delta:
+            self.events.append({"kind": "report_delta", "text": self._pending_delta})
+            self._pending_delta = ""
+        if kind != "report_delta":
+            self.events.append({"kind": kind, **data})
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def wait_for_events(self, seen: int, timeout: float) -> bool:
+        """Wait until there are more than seen events or the job finished; False on timeout"""
+        if len(self.events) > seen or self.finished:
+            return True
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "query": self.query,
+            "submitted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.submitted_at)),
+            "finished_at": (time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.finished_at))
+                            if self.finished_at else None),
+            "progress": [event["text"] for event in self.events if event["kind"] == "status"],
+            "report": self.report,
+            "error": self.error,
+            "metrics": get_metrics().run_summary(self.id),
+        }
+
+
+class ResearchJobs:
+    """Runs API research jobs through the JobScheduler and keeps the most recent ones for polling"""
+
+    def __init__(self, scheduler: JobScheduler | None = None, max_jobs: int = MAX_JOBS):
+        self.scheduler = scheduler or JobScheduler(max_jobs_per_session=MAX_JOBS_PER_CLIENT)
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, ResearchJob] = OrderedDict()
+        # Registers the metrics trace processor before the first run
+        get_metrics()
+
+    def get(self, job_id: str) -> ResearchJob | None:
+        return self._jobs.get(job_id)
+
+    def submit(self, query: str, answers: list[str] | None = None, email: str = "", client: str = "") -> ResearchJob:
+        """Start a research job, raising ValueError for bad input and JobRejected when the client is at its
+        limit or the queue is full"""
+        if not query or not query.strip():
+            raise ValueError("A research query is required.")
+        if email and not is_valid_email(email):
+            raise ValueError("Please provide a valid email address.")
+        job = ResearchJob(id=gen_trace_id(), query=query.strip(), answers=answers or [], email=email.strip(),
+                          client=client)
+        self._start(job)
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def retry(self, job: ResearchJob) -> None:
+        """Run a failed job again; it resumes from its last completed stage"""
+        if job.status != "failed":
+            raise ValueError(f"Only failed runs can be retried, this one is {job.status}.")
+        self._start(job)
+        job.status, job.error, job.finished_at = "queued", None, None
+        job.publish("status", text="Retrying from the last completed stage")
+
+    def _start(self, job: ResearchJob) -> None:
+        """Take the job's scheduler slot now, before answering the request, and start running it"""
+        refined_query = refine_query(job.query, job.answers)
+        context = ResearchContext()
+        context.checkpoint = RunCheckpoint(get_checkpoint_store(), job.id, refined_query)
+        self.scheduler.reserve(job.session)
+        job.task = asyncio.create_task(self._run(job, research_input(refined_query), context))
+
+    async def _run(self, job: ResearchJob, input_message: str, context: ResearchContext) -> None:
+        try:
+            with trace("Research trace", trace_id=job.id):
+                events = self.scheduler.submit(job.session, lambda: stream_research(input_message, context), reserved=True)
+                async for event in events:
+                    if isinstance(event, QueueStatus):
+                        job.publish("queue", position=event.position, eta_seconds=round(event.eta_seconds))
+                        continue
+                    job.status = "running"
+                    if event.kind != "done":
+                        job.publish(event.kind, text=event.text)
+                        continue
+                    if event.report is not None:
+                        job.report = event.report.model_dump()
+                if job.report is None:
+                    raise ValueError("Report not found in output. Please check the trace for details.")
+                if job.email:
+                    get_outbox().send_report(job.email, job.report["markdown_report"])
+            job.finished_at = time.time()
+            job.status = "done"
+            job.publish("done", report=job.report)
+        except Exception as e:
+            job.finished_at = time.time()
+            job.status, job.error = "failed", str(e)
+            job.publish("error", error=job.error)
+
+    def _evict(self) -> None:
+        while len(self._jobs) > self.max_jobs:
+            oldest = next((job_id for job_id, job in self._jobs.items() if job.finished), None)
+            if oldest is None:
+                return
+            del self._jobs[oldest]
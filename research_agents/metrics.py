@@ -0,0 +1,350 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from agents import add_trace_processor, get_current_trace
+from agents.tracing import Span, Trace, TracingProcessor
+from agents.tracing.span_data import AgentSpanData, FunctionSpanData, GenerationSpanData, ResponseSpanData
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+MAX_RUNS = 200
+DURATION_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0)
+
+# USD per million input and output tokens; model names match by prefix, e.g. "gpt-4o-mini-2024-07-18"
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+# USD per hosted web search call at the search agent's "low" search context size
+WEB_SEARCH_CALL_PRICE = 0.025
+
+
+def estimate_cost(model: str | None, input_tokens: int, output_tokens: int, web_searches: int = 0) -> float:
+    """Estimate the USD cost of one model call from MODEL_PRICES, or just its web searches for unknown models"""
+    cost = web_searches * WEB_SEARCH_CALL_PRICE
+    prices = [p for name, p in sorted(MODEL_PRICES.items(), key=lambda kv: -len(kv[0])) if (model or "").startswith(name)]
+    if prices:
+        input_price, output_price = prices[0]
+        cost += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    return cost
+
+
+def current_run_id() -> str | None:
+    """The ID of the research run being traced in the current context, if any"""
+    trace = get_current_trace()
+    return trace.trace_id if trace else None
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    errors: int = 0
+
+
+@dataclass
+class RunMetrics:
+    """Measurements for one research run, grouped by stage kind ("agent", "model", "tool") and name.
+
+    "model" stages are LLM calls named after the agent that made them, so the research manager's own
+    turns are reported separately from the agents it calls through tools.
+    """
+    run_id: str
+    name: str
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    queue_wait_seconds: float = 0.0
+    stages: dict[tuple[str, str], StageStats] = field(default_factory=dict)
+    retries: dict[str, int] = field(default_factory=dict)
+
+    def stage(self, kind: str, name: str) -> StageStats:
+        return self.stages.setdefault((kind, name), StageStats())
+
+    def summary(self) -> dict[str, Any]:
+        """Summarize the run as JSON-serializable totals and per-stage breakdowns"""
+        models = [s for (kind, _), s in self.stages.items() if kind == "model"]
+        summary: dict[str, Any] = {
+            "run_id": self.run_id,
+            "name": self.name,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+            "finished": self.finished_at is not None,
+            "wall_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "queue_wait_seconds": round(self.queue_wait_seconds, 3),
+            "llm_calls": sum(s.calls for s in models),
+            "input_tokens": sum(s.input_tokens for s in models),
+            "output_tokens": sum(s.output_tokens for s in models),
+            "cost_usd": round(sum(s.cost_usd for s in models), 6),
+            "retries": dict(self.retries),
+        }
+        for (kind, name), s in sorted(self.stages.items()):
+            stats = {"calls": s.calls, "seconds": round(s.seconds, 3), "errors": s.errors}
+            if kind == "model":
+                stats.update(input_tokens=s.input_tokens, output_tokens=s.output_tokens, cost_usd=round(s.cost_usd, 6))
+            summary.setdefault(kind, {})[name] = stats
+        return summary
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+class MetricsCollector(TracingProcessor):
+    """Trace processor that turns agent, tool and model call spans into metrics.
+
+    Every research run is traced, so the trace ID is used as the run ID. Per-run summaries are kept for
+    the last MAX_RUNS runs; process-wide counters and histograms, labelled by stage but not by run, are
+    rendered in the Prometheus text format. Spans end on the event loop while the metrics endpoint reads
+    from its own thread, so all state is guarded by a lock.
+    """
+
+    def __init__(self, max_runs: int = MAX_RUNS):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._runs: OrderedDict[str, RunMetrics] = OrderedDict()
+        self._open_spans: dict[str, float] = {}
+        self._span_agents: dict[str, str] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+
+    def run(self, run_id: str, name: str = "") -> RunMetrics:
+        """Return the metrics of a run, starting them if the run is new"""
+        with self._lock:
+            return self._run(run_id, name)
+
+    def run_summary(self, run_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            return run.summary() if run else None
+
+    def run_ids(self) -> list[str]:
+        with self._lock:
+            return list(self._runs)
+
+    def record_queue_wait(self, seconds: float, run_id: str | None = None) -> None:
+        """Record how long a run waited for a worker before starting"""
+        run_id = run_id or current_run_id()
+        with self._lock:
+            if run_id:
+                self._run(run_id).queue_wait_seconds += seconds
+            self._observe("research_queue_wait_seconds", (), seconds)
+
+    def record_retry(self, stage: str, run_id: str | None = None) -> None:
+        """Count one retried operation, e.g. a search re-run after failing or an email resent"""
+        run_id = run_id or current_run_id()
+        with self._lock:
+            if run_id:
+                retries = self._run(run_id).retries
+                retries[stage] = retries.get(stage, 0) + 1
+            self._count("research_retries_total", (("stage", stage),))
+
+    def record_prescreen(self, verdict: str, outcome: str) -> None:
+        """Count a local pre-screen verdict and whether the LLM evaluator was skipped, agreed or disagreed"""
+        with self._lock:
+            self._count("research_prescreen_total", (("verdict", verdict), ("outcome", outcome)))
+
+    def prometheus(self) -> str:
+        """Render process-wide metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters: dict[str, list] = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append((labels, value))
+            for name, series in counters.items():
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{_labels(labels)} {value:g}" for labels, value in series)
+            histograms: dict[str, list] = {}
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, []).append((labels, histogram))
+            for name, series in histograms.items():
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in series:
+                    for bound, count in zip(h.buckets + (float("inf"),), h.counts + [h.count]):
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {h.sum:g}")
+                    lines.append(f"{name}_count{_labels(labels)} {h.count}")
+            lines.append("# TYPE research_runs_in_progress gauge")
+            lines.append(f"research_runs_in_progress {sum(1 for r in self._runs.values() if r.finished_at is None)}")
+        return "\n".join(lines) + "\n"
+
+    def on_trace_start(self, trace: Trace) -> None:
+        with self._lock:
+            run = self._run(trace.trace_id, trace.name)
+            # Clarification and research share a trace ID; time the research from its own start
+            run.name, run.started_at, run.finished_at = trace.name, time.time(), None
+
+    def on_trace_end(self, trace: Trace) -> None:
+        with self._lock:
+            run = self._run(trace.trace_id, trace.name)
+            run.finished_at = time.time()
+            self._count("research_runs_total", ())
+            self._observe("research_run_duration_seconds", (), run.finished_at - run.started_at)
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        with self._lock:
+            self._open_spans[span.span_id] = time.monotonic()
+            data = span.span_data
+            agent = data.name if isinstance(data, AgentSpanData) else self._span_agents.get(span.parent_id or "")
+            if agent:
+                self._span_agents[span.span_id] = agent
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        with self._lock:
+            started = self._open_spans.pop(span.span_id, None)
+            agent = self._span_agents.pop(span.span_id, None) or "unknown"
+            if started is None:
+                return
+            seconds = time.monotonic() - started
+            data = span.span_data
+            if isinstance(data, AgentSpanData):
+                kind, name = "agent", data.name
+            elif isinstance(data, FunctionSpanData):
+                kind, name = "tool", data.name
+            elif isinstance(data, (ResponseSpanData, GenerationSpanData)):
+                kind, name = "model", agent
+            else:
+                return
+            stats = self._run(span.trace_id).stage(kind, name)
+            stats.calls += 1
+            stats.seconds += seconds
+            labels = (("kind", kind), ("stage", name))
+            self._observe("research_stage_duration_seconds", labels, seconds)
+            if span.error is not None:
+                stats.errors += 1
+                self._count("research_stage_errors_total", labels)
+            if kind == "model":
+                model, input_tokens, output_tokens, web_searches = _model_usage(data)
+                cost = estimate_cost(model, input_tokens, output_tokens, web_searches)
+                stats.input_tokens += input_tokens
+                stats.output_tokens += output_tokens
+                stats.cost_usd += cost
+                self._count("research_tokens_total", (("stage", name), ("direction", "input")), input_tokens)
+                self._count("research_tokens_total", (("stage", name), ("direction", "output")), output_tokens)
+                self._count("research_cost_usd_total", (("stage", name),), cost)
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+    def _run(self, run_id: str, name: str = "") -> RunMetrics:
+        run = self._runs.get(run_id)
+        if run is None:
+            run = self._runs[run_id] = RunMetrics(run_id, name)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+        return run
+
+    def _count(self, name: str, labels: tuple, value: float = 1) -> None:
+        self._counters[(name, labels)] = self._counters.get((name, labels), 0) + value
+
+    def _observe(self, name: str, labels: tuple, value: float) -> None:
+        self._histograms.setdefault((name, labels), Histogram()).observe(value)
+
+
+def _model_usage(data: ResponseSpanData | GenerationSpanData) -> tuple[str | None, int, int, int]:
+    """Model name, input and output tokens and hosted web search calls of a model call span"""
+    if isinstance(data, GenerationSpanData):
+        usage = data.usage or {}
+        return data.model, usage.get("input_tokens", 0), usage.get("output_tokens", 0), 0
+    response = data.response
+    if response is None:
+        return None, 0, 0, 0
+    usage = getattr(response, "usage", None)
+    web_searches = sum(1 for item in getattr(response, "output", None) or [] if getattr(item, "type", "") == "web_search_call")
+    return (
+        getattr(response, "model", None),
+        usage.input_tokens if usage else 0,
+        usage.output_tokens if usage else 0,
+        web_searches,
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    collector: MetricsCollector
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/metrics":
+            self._reply(200, "text/plain; version=0.0.4", self.collector.prometheus())
+        elif path == "/runs":
+            self._reply(200, "application/json", json.dumps(self.collector.run_ids()))
+        elif path.startswith("/runs/"):
+            summary = self.collector.run_summary(path[len("/runs/"):])
+            if summary is None:
+                self._reply(404, "application/json", json.dumps({"error": "unknown run"}))
+            else:
+                self._reply(200, "application/json", json.dumps(summary, indent=2))
+        else:
+            self._reply(404, "text/plain", "not found\n")
+
+    def _reply(self, status: int, content_type: str, body: str) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(collector: MetricsCollector, host: str | None = None, port: int | None = None) -> ThreadingHTTPServer | None:
+    """Serve /metrics (Prometheus), /runs and /runs/<run_id> (JSON summaries) from a daemon thread.
+
+    The port comes from METRICS_PORT (default 9464); set it to 0 to disable the endpoint.
+    """
+    host = host or os.environ.get("METRICS_HOST", METRICS_HOST)
+    port = port if port is not None else int(os.environ.get("METRICS_PORT", METRICS_PORT))
+    if not port:
+        return None
+    handler = type("MetricsHandler", (_MetricsHandler,), {"collector": collector})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        print(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+_collector: MetricsCollector | None = None
+
+
+def get_metrics() -> MetricsCollector:
+    """Return the process-wide metrics collector, registering it as a trace processor on first use"""
+    global _collector
+    if _collector is None:
+        _collector = MetricsCollector()
+        add_trace_processor(_collector)
+    return _collector
@@ -0,0 +1,332 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import threading
+import time
+from typing import Any, AsyncIterator
+
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, RateLimitError
+from agents import Model, ModelProvider, OpenAIProvider, RunConfig
+from .metrics import get_metrics
+from .models import fallback_model
+
+# Requests and tokens per minute per model; the prefix match picks the longest name, like MODEL_PRICES
+MODEL_LIMITS = {
+    "gpt-4o-mini": (500, 200_000),
+    "gpt-4o": (500, 30_000),
+    "gpt-4.1-nano": (500, 200_000),
+    "gpt-4.1-mini": (500, 200_000),
+    "gpt-4.1": (500, 30_000),
+}
+DEFAULT_LIMITS = (500, 30_000)
+MAX_CONCURRENT_CALLS = 32
+ESTIMATED_OUTPUT_TOKENS = 1000
+MAX_ATTEMPTS = 6
+FALLBACK_AFTER_THROTTLES = 3
+THROTTLE_BACKOFF_SECONDS = 2.0
+MAX_THROTTLE_BACKOFF_SECONDS = 60.0
+# How long a model that keeps answering 429 is skipped in favour of the fallback
+THROTTLED_COOLDOWN_SECONDS = 60.0
+# Connection errors, timeouts and 5xx are retried like the OpenAI client does, whose own retries are off
+MAX_TRANSIENT_RETRIES = 2
+TRANSIENT_BACKOFF_SECONDS = 0.5
+MAX_TRANSIENT_BACKOFF_SECONDS = 8.0
+
+# Lower values are served first when calls wait for the same model
+PRIORITIES = {"interactive": 0, "batch": 1}
+model_priority: contextvars.ContextVar[str] = contextvars.ContextVar("model_priority", default="interactive")
+
+
+def model_limits(model: str) -> tuple[int, int]:
+    matches = [limits for name, limits in sorted(MODEL_LIMITS.items(), key=lambda kv: -len(kv[0])) if model.startswith(name)]
+    return matches[0] if matches else DEFAULT_LIMITS
+
+
+def estimate_tokens(system_instructions: str | None, input: Any, max_output_tokens: int | None) -> int:
+    """Rough token count of a call before it is made: about 4 characters per token plus the expected output"""
+    text = (system_instructions or "") + (input if isinstance(input, str) else json.dumps(input, default=str))
+    return len(text) // 4 + (max_output_tokens or ESTIMATED_OUTPUT_TOKENS)
+
+
+class TokenBucket:
+    """Allows up to per_minute units a minute, refilled continuously"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken; more than the capacity only waits for a full bucket"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+
+class _ModelLimiter:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttles = 0
+        self.throttled_at = 0.0
+        self.waiters: list[tuple[int, int]] = []
+        self.condition = asyncio.Condition()
+
+    def wait_time(self, tokens: int) -> float:
+        return max(self.paused_until - time.monotonic(), self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+
+class ModelScheduler:
+    """Central admission control for model calls across all concurrent runs.
+
+    Each model gets token buckets for requests and tokens per minute and a concurrency limit. Waiting
+    calls are admitted in priority order ("interactive" before "batch"), then first come first served.
+    A 429 pauses the model for its retry-after time and halves its concurrency; successful calls raise
+    it again by one per window of calls, up to max_concurrency.
+    """
+
+    def __init__(self, limits: dict[str, tuple[int, int]] | None = None, max_concurrency: int = MAX_CONCURRENT_CALLS):
+        self.limits = limits
+        self.max_concurrency = max_concurrency
+        self.throttled_calls = 0
+        self._limiters: dict[str, _ModelLimiter] = {}
+        self._sequence = itertools.count()
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        if model not in self._limiters:
+            rpm, tpm = (self.limits or {}).get(model) or model_limits(model)
+            self._limiters[model] = _ModelLimiter(rpm, tpm, self.max_concurrency)
+        return self._limiters[model]
+
+    async def acquire(self, model: str, tokens: int, priority: str = "interactive") -> None:
+        """Wait until a call of about this many tokens may be made to the model"""
+        limiter = self._limiter(model)
+        key = (PRIORITIES.get(priority, len(PRIORITIES)), next(self._sequence))
+        async with limiter.condition:
+            heapq.heappush(limiter.waiters, key)
+            try:
+                while True:
+                    timeout = None
+                    if limiter.waiters[0] == key and limiter.in_flight < int(limiter.concurrency):
+                        timeout = limiter.wait_time(tokens)
+                        if timeout <= 0:
+                            heapq.heappop(limiter.waiters)
+                            limiter.requests.take(1)
+                            limiter.tokens.take(tokens)
+                            limiter.in_flight += 1
+                            limiter.condition.notify_all()
+                            return
+                    try:
+                        await asyncio.wait_for(limiter.condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if key in limiter.waiters:
+                    limiter.waiters.remove(key)
+                    heapq.heapify(limiter.waiters)
+                    limiter.condition.notify_all()
+                raise
+
+    async def release(self, model: str, estimated_tokens: int, used_tokens: int | None = None,
+                      throttled: bool = False, retry_after: float | None = None) -> None:
+        """Finish a call, correcting the token bucket by its actual usage and adapting to throttling"""
+        limiter = self._limiter(model)
+        async with limiter.condition:
+            limiter.in_flight -= 1
+            if used_tokens is not None:
+                limiter.tokens.take(used_tokens - estimated_tokens)
+            if throttled:
+                self.throttled_calls += 1
+                limiter.throttles += 1
+                limiter.throttled_at = time.monotonic()
+                backoff = retry_after or min(MAX_THROTTLE_BACKOFF_SECONDS,
+                                             THROTTLE_BACKOFF_SECONDS * 2 ** (limiter.throttles - 1))
+                limiter.paused_until = max(limiter.paused_until, time.monotonic() + backoff)
+                limiter.concurrency = max(1.0, limiter.concurrency / 2)
+            else:
+                limiter.throttles = 0
+                limiter.concurrency = min(limiter.max_concurrency, limiter.concurrency + 1 / limiter.concurrency)
+            limiter.condition.notify_all()
+
+    def is_throttled(self, model: str) -> bool:
+        """Whether the model has kept answering 429 recently"""
+        limiter = self._limiter(model)
+        return (limiter.throttles >= FALLBACK_AFTER_THROTTLES
+                and time.monotonic() - limiter.throttled_at < THROTTLED_COOLDOWN_SECONDS)
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            model: {"concurrency": int(limiter.concurrency), "in_flight": limiter.in_flight,
+                    "waiting": len(limiter.waiters), "throttles": limiter.throttles}
+            for model, limiter in self._limiters.items()
+        }
+
+
+def retry_after_seconds(error: RateLimitError) -> float | None:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an error other than a 429 is worth retrying, by the OpenAI client's own rules"""
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code in (408, 409) or error.status_code >= 500)
+
+
+def transient_backoff(failures: int) -> float:
+    return min(MAX_TRANSIENT_BACKOFF_SECONDS, TRANSIENT_BACKOFF_SECONDS * 2 ** (failures - 1))
+
+
+class ScheduledModel(Model):
+    """Makes every call through the ModelScheduler, retrying 429s and moving to the fallback model
+    once the routed model stays throttled. Connection errors, timeouts and 5xx are retried with backoff."""
+
+    def __init__(self, provider: "ScheduledModelProvider", model_name: str):
+        self.provider = provider
+        self.model_name = model_name
+
+    def _candidates(self) -> list[str]:
+        fallback = self.provider.fallback
+        if fallback is None or fallback == self.model_name:
+            return [self.model_name]
+        return [fallback] if self.provider.scheduler.is_throttled(self.model_name) else [self.model_name, fallback]
+
+    def _next_model(self, candidates: list[str], throttles: int) -> str:
+        if len(candidates) > 1 and throttles >= FALLBACK_AFTER_THROTTLES:
+            return candidates[1]
+        return candidates[0]
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, *, previous_response_id):
+        scheduler = self.provider.scheduler
+        candidates = self._candidates()
+        estimated = estimate_tokens(system_instructions, input, model_settings.max_tokens)
+        throttles = failures = 0
+        for attempt in range(MAX_ATTEMPTS):
+            model_name = self._next_model(candidates, throttles)
+            await scheduler.acquire(model_name, estimated, model_priority.get())
+            try:
+                response = await self.provider.inner_model(model_name).get_response(
+                    system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+                    previous_response_id=previous_response_id,
+                )
+            except RateLimitError as e:
+                await scheduler.release(model_name, estimated, throttled=True, retry_after=retry_after_seconds(e))
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                throttles += 1
+                get_metrics().record_retry("model")
+                continue
+            except Exception as e:
+                await scheduler.release(model_name, estimated)
+                if not is_transient(e) or failures == MAX_TRANSIENT_RETRIES or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                failures += 1
+                get_metrics().record_retry("model")
+                await asyncio.sleep(transient_backoff(failures))
+                continue
+            except BaseException:
+                await scheduler.release(model_name, estimated)
+                raise
+            await scheduler.release(model_name, estimated, response.usage.total_tokens)
+            return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                              tracing, *, previous_response_id) -> AsyncIterator[Any]:
+        scheduler = self.provider.scheduler
+        candidates = self._candidates()
+        estimated = estimate_tokens(system_instructions, input, model_settings.max_tokens)
+        throttles = failures = 0
+        for attempt in range(MAX_ATTEMPTS):
+            model_name = self._next_model(candidates, throttles)
+            await scheduler.acquire(model_name, estimated, model_priority.get())
+            used, started = None, False
+            try:
+                async for event in self.provider.inner_model(model_name).stream_response(
+                    system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+                    previous_response_id=previous_response_id,
+                ):
+                    started = True
+                    if event.type == "response.completed" and event.response.usage is not None:
+                        used = event.response.usage.total_tokens
+                    yield event
+            except RateLimitError as e:
+                await scheduler.release(model_name, estimated, throttled=True, retry_after=retry_after_seconds(e))
+                # A stream that already produced output cannot be replayed
+                if started or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                throttles += 1
+                get_metrics().record_retry("model")
+                continue
+            except Exception as e:
+                await scheduler.release(model_name, estimated)
+                if started or not is_transient(e) or failures == MAX_TRANSIENT_RETRIES or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                failures += 1
+                get_metrics().record_retry("model")
+                await asyncio.sleep(transient_backoff(failures))
+                continue
+            except BaseException:
+                await scheduler.release(model_name, estimated)
+                raise
+            await scheduler.release(model_name, estimated, used)
+            return
+
+
+class ScheduledModelProvider(ModelProvider):
+    """Model provider that routes every call of the wrapped provider through a ModelScheduler.
+
+    By default it wraps an OpenAIProvider whose client does not retry by itself, so 429s reach the
+    scheduler instead of being retried blindly by each call. ScheduledModel retries the other errors
+    the client would have retried.
+    """
+
+    def __init__(self, scheduler: ModelScheduler, inner: ModelProvider | None = None, fallback: str | None = None):
+        self.scheduler = scheduler
+        self.inner = inner
+        self.fallback = fallback
+        self._models: dict[str, Model] = {}
+
+    def inner_model(self, model_name: str) -> Model:
+        if model_name not in self._models:
+            if self.inner is None:
+                # Created on first use, like OpenAIProvider's own client, so importing needs no API key
+                self.inner = OpenAIProvider(openai_client=AsyncOpenAI(max_retries=0))
+            self._models[model_name] = self.inner.get_model(model_name)
+        return self._models[model_name]
+
+    def get_model(self, model_name: str | None) -> Model:
+        return ScheduledModel(self, model_name or "gpt-4o-mini")
+
+
+_model_provider: ScheduledModelProvider | None = None
+_model_provider_lock = threading.Lock()
+
+
+def get_model_provider() -> ScheduledModelProvider:
+    """Return the process-wide scheduled model provider, creating it on first use"""
+    global _model_provider
+    with _model_provider_lock:
+        if _model_provider is None:
+            _model_provider = ScheduledModelProvider(ModelScheduler(), fallback=fallback_model())
+        return _model_provider
+
+
+def default_run_config() -> RunConfig:
+    """Run config that sends every model call through the shared model scheduler"""
+    return RunConfig(model_provider=get_model_provider())
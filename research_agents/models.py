@@ -0,0 +1,24 @@
+import os
+
+# Model each agent runs on; override one with <AGENT>_MODEL in the environment, e.g. WRITER_MODEL=gpt-4.1
+AGENT_MODELS = {
+    "manager": "gpt-4o-mini",
+    "clarifier": "gpt-4o-mini",
+    "planner": "gpt-4o-mini",
+    "search": "gpt-4o-mini",
+    "writer": "gpt-4o-mini",
+    "reviser": "gpt-4o-mini",
+    "evaluator": "gpt-4o-mini",
+    "optimizer": "gpt-4o-mini",
+}
+# Used for a call once its own model stays throttled; override with FALLBACK_MODEL, empty disables it
+FALLBACK_MODEL = "gpt-4.1-mini"
+
+
+def model_for(agent: str) -> str:
+    """The model an agent is routed to"""
+    return os.environ.get(f"{agent.upper()}_MODEL") or AGENT_MODELS[agent]
+
+
+def fallback_model() -> str | None:
+    return os.environ.get("FALLBACK_MODEL", FALLBACK_MODEL) or None
@@ -1,4 +1,5 @@
 from agents import Agent
+from .models import model_for
 
 INSTRUCTIONS = """You are a query optimizer for research. Your job is to refine and improve research queries based on evaluation feedback.
 
@@ -16,6 +17,6 @@ Return only the refined query text, no additional commentary."""
 optimizer_agent = Agent(
     name="OptimizerAgent",
     instructions=INSTRUCTIONS,
-    model="gpt-4o-mini",
+    model=model_for("optimizer"),
 )
 
@@ -0,0 +1,131 @@
+import asyncio
+import re
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from agents import Runner
+from agents.exceptions import MaxTurnsExceeded
+from .artifacts import Artifact
+from .budget import BudgetExceeded, best_report, stop_message
+from .context import ResearchContext
+from .planner import WebSearchPlan
+from .progress import ProgressEvent
+from .research_manager import research_manager
+
+
+def refine_query(original_query: str, answers: list[str] | None) -> str:
+    """Refine the query by incorporating clarification answers"""
+    if not answers or len(answers) == 0:
+        return original_query
+    
+    answers_text = "\n".join([f"- {answer}" for answer in answers if answer and answer.strip()])
+    if answers_text:
+        return f"{original_query}\n\nAdditional context from clarification:\n{answers_text}"
+    return original_query
+
+
+def research_input(refined_query: str) -> str:
+    """Build the research manager's input message for a query"""
+    return (
+        f"Research query: {refined_query}\n\nPlease conduct thorough research on this topic. Plan searches, "
+        "perform them, write a report, evaluate it, and iterate if needed until you have a high-quality, complete report."
+    )
+
+
+def describe_tool_output(tool_name: str, output: str) -> str | None:
+    """Turn a research manager tool result into a stage message for the user"""
+    if tool_name == "plan_searches":
+        try:
+            plan = WebSearchPlan.model_validate_json(output)
+        except ValidationError:
+            return None
+        return f"Planning done: {len(plan.searches)} searches planned"
+    if tool_name == "refine_query":
+        return "Query refined"
+    return None
+
+
+def final_report(context: ResearchContext, final_output: str) -> Artifact | None:
+    """Resolve the report handle the research manager finished with, falling back to the best report"""
+    match = re.search(r"report-\d+", final_output)
+    artifact = None
+    if match:
+        try:
+            artifact = context.artifacts.get(match.group(0), "report")
+        except KeyError:
+            artifact = None
+    return artifact or best_report(context.artifacts)
+
+
+async def stream_research(input_message: str, context: ResearchContext) -> AsyncIterator[ProgressEvent]:
+    """Run the research manager, yielding progress events and finally a "done" event with the report.
+
+    The "done" event carries the report's markdown as text and the full ReportData as report.
+    When the run's wall time or turn budget runs out, the manager is stopped and the best report so far is
+    returned in a partial "done" event.
+    With a checkpoint in the context, a retry of an interrupted run resumes from its last completed stage;
+    the checkpoints are dropped once the run returns a report.
+    """
+    progress = context.progress
+    budget = context.budget
+    checkpoint = context.checkpoint
+    resume_note = checkpoint.attach(context) if checkpoint is not None else None
+    if resume_note is not None:
+        input_message += f"\n\n{resume_note}"
+        if budget.stop_reason:
+            input_message += f"\n{stop_message(budget.stop_reason, context.artifacts)}"
+    budget.start()
+    result = Runner.run_streamed(research_manager, input_message, context=context, run_config=context.run_config,
+                                 max_turns=budget.max_turns)
+
+    async def consume_manager_events():
+        tool_names = {}
+        async for event in result.stream_events():
+            if event.type != "run_item_stream_event":
+                continue
+            if event.name == "tool_called":
+                tool_names[event.item.raw_item.call_id] = event.item.raw_item.name
+            elif event.name == "tool_output":
+                tool_name = tool_names.get(event.item.raw_item["call_id"], "")
+                message = describe_tool_output(tool_name, str(event.item.output))
+                if message:
+                    progress.status(message)
+
+    async def forward_manager_events():
+        try:
+            try:
+                await asyncio.wait_for(consume_manager_events(), timeout=max(0.0, budget.remaining_seconds()))
+                artifact = final_report(context, str(result.final_output))
+            except (asyncio.TimeoutError, MaxTurnsExceeded) as e:
+                result.cancel()
+                reason = (f"time budget of {budget.max_seconds:.0f}s used up" if isinstance(e, asyncio.TimeoutError)
+                          else f"turn limit of {budget.max_turns} reached")
+                budget.limit_reason = reason
+                artifact = best_report(context.artifacts)
+                if artifact is None:
+                    raise BudgetExceeded(f"Research stopped before a report was written: {reason}") from e
+                progress.status(f"Stopping: {reason}. Returning the best report so far ({artifact.handle})")
+            if artifact is None:
+                progress.done(str(result.final_output))
+            else:
+                if checkpoint is not None:
+                    checkpoint.clear()
+                progress.done(artifact.value.markdown_report, artifact.value, partial=budget.limit_reason is not None)
+        finally:
+            progress.close()
+
+    progress.status("Starting research... This may take a few minutes.")
+    if resume_note is not None:
+        progress.status(f"Resuming from the last completed stage ({len(context.artifacts.all('search'))} searches, "
+                        f"{len(context.artifacts.all('report'))} reports, {len(budget.scores)} evaluations saved)")
+    task = asyncio.create_task(forward_manager_events())
+    try:
+        async for event in progress:
+            yield event
+        await task
+    finally:
+        if not task.done():
+            result.cancel()
+            task.cancel()
+        if context.speculation is not None:
+            context.speculation.cancel()
@@ -1,23 +1,81 @@
+import re
+from typing import Literal
+
 from pydantic import BaseModel, Field
 from agents import Agent
+from .budget import RunBudget
+from .models import model_for
+
+MIN_SEARCHES = 2
+MAX_SEARCHES = 8
+BASE_SEARCHES = 3
+# Lower values are run first, and "low" searches are the first skipped when the budget runs short
+SEARCH_PRIORITIES = {"high": 0, "medium": 1, "low": 2}
 
-HOW_MANY_SEARCHES = 3
+# Words that mark a query as broad (more searches) or a short factual question (fewer)
+BROAD_TERMS = {"compare", "comparison", "versus", "vs", "survey", "overview", "landscape", "review", "trends",
+               "developments", "history", "impact", "effects", "pros", "cons", "worldwide", "global", "countries"}
+FACTUAL_OPENERS = ("who ", "when ", "where ", "which ", "what is ", "what was ", "what are ", "how many ", "how much ")
+DETAIL_TERMS = {"detailed", "comprehensive", "in-depth", "thorough", "all", "every", "compare", "deep"}
+BRIEF_TERMS = {"brief", "short", "quick", "just", "only", "simple", "summary", "high-level"}
 
 INSTRUCTIONS = f"You are a helpful research assistant. Given a query, come up with a set of web searches \
-to perform to best answer the query. Output {HOW_MANY_SEARCHES} terms to query for."
+to perform to best answer the query. Choose how many searches to perform, between {MIN_SEARCHES} and \
+{MAX_SEARCHES}: a narrow factual question needs only a few, a broad survey or comparison needs one per aspect. \
+The input suggests a number for the query and the remaining budget; stay within the range it gives. \
+Give each search a priority: high for searches the answer cannot do without, medium for searches that \
+complete the picture, and low for searches that only add breadth. Low-priority searches are skipped when the \
+research budget runs short."
 
 
 class WebSearchItem(BaseModel):
     reason: str = Field(description="Your reasoning for why this search is important to the query.")
     query: str = Field(description="The search term to use for the web search.")
+    priority: Literal["high", "medium", "low"] = Field(description="How much the answer depends on this search: high, medium or low.")
 
 
 class WebSearchPlan(BaseModel):
     searches: list[WebSearchItem] = Field(description="A list of web searches to perform to best answer the query.")
-    
+
+
+def suggested_searches(query: str, budget: RunBudget | None = None) -> tuple[int, int, int]:
+    """Suggest how many searches to plan for a query, and the range allowed, as (suggested, low, high).
+
+    Broad queries (comparisons, surveys, several aspects) get more searches and short factual questions
+    fewer. Clarification answers asking for detail or brevity move the suggestion by one. The upper bound
+    keeps half of the run's remaining search budget for follow-up rounds.
+    """
+    question, _, answers = query.partition("Additional context from clarification:")
+    words = re.findall(r"[a-z0-9-]+", question.lower())
+    count = BASE_SEARCHES
+    if question.strip().lower().startswith(FACTUAL_OPENERS) and len(words) <= 15:
+        count -= 1
+    count += min(2, len(BROAD_TERMS.intersection(words)))
+    # Each extra aspect joined by "and" or a comma gets its own search
+    count += min(2, len(re.findall(r",|\band\b", question)))
+    answer_words = set(re.findall(r"[a-z-]+", answers.lower()))
+    count += (1 if answer_words & DETAIL_TERMS else 0) - (1 if answer_words & BRIEF_TERMS else 0)
+
+    high = MAX_SEARCHES
+    if budget is not None:
+        high = max(1, min(MAX_SEARCHES, budget.remaining_searches() // 2))
+    low = min(MIN_SEARCHES, high)
+    return max(low, min(high, count)), low, high
+
+
+def planner_input(query: str, budget: RunBudget | None = None) -> str:
+    suggested, low, high = suggested_searches(query, budget)
+    return f"Query: {query}\n\nSuggested number of searches: {suggested} (plan between {low} and {high})"
+
+
+def by_priority(searches: list[WebSearchItem]) -> list[WebSearchItem]:
+    """Order searches from high to low priority, keeping the planned order within each priority"""
+    return sorted(searches, key=lambda item: SEARCH_PRIORITIES[item.priority])
+
+
 planner_agent = Agent(
     name="PlannerAgent",
     instructions=INSTRUCTIONS,
-    model="gpt-4o-mini",
+    model=model_for("planner"),
     output_type=WebSearchPlan,
 )
@@ -0,0 +1,150 @@
+import random
+import re
+from dataclasses import dataclass, field
+
+from .dedup import STOP_WORDS
+from .evaluator import EvaluationResult
+from .reviser import heading_key, split_sections
+from .writer import ReportData
+
+TARGET_WORDS = 1000
+MIN_SECTIONS = 4
+FAIL_WORDS = 400
+FAIL_TERM_COVERAGE = 0.5
+PASS_TERM_COVERAGE = 0.8
+PASS_PREVIOUS_SCORE = 0.7
+AUDIT_RATE = 0.1
+STEM_LENGTH = 6
+FEEDBACK_PREFIX = "Local pre-screen: "
+# refine_query appends clarification answers under this line; they are context, not terms to cover
+CLARIFICATION_HEADING = "Additional context from clarification:"
+
+
+@dataclass
+class PrescreenThresholds:
+    """When the local pre-screen may decide an evaluation without the LLM evaluator.
+
+    A report clearly fails when it is far below the writer's length target, has almost no section
+    structure or misses most of the query's key terms. A revision of a report the evaluator scored at least
+    pass_previous_score, whose changed sections cover the terms of every missing aspect from that evaluation,
+    is a likely pass. Only failures are decided locally: the reviser is asked to write about exactly those
+    aspects, so a likely pass still goes to the LLM evaluator and is only compared with its result.
+    audit_rate is the share of clear failures that still go to the evaluator so the pre-screen's agreement
+    with it can be counted.
+    """
+    target_words: int = TARGET_WORDS
+    min_sections: int = MIN_SECTIONS
+    fail_words: int = FAIL_WORDS
+    fail_term_coverage: float = FAIL_TERM_COVERAGE
+    pass_term_coverage: float = PASS_TERM_COVERAGE
+    pass_previous_score: float = PASS_PREVIOUS_SCORE
+    audit_rate: float = AUDIT_RATE
+
+
+@dataclass
+class Prescreen:
+    """Result of the local checks: a verdict of "pass", "fail" or "unclear" and a 0-1 score"""
+    verdict: str
+    score: float
+    words: int
+    sections: int
+    term_coverage: float
+    topic_coverage: float
+    has_follow_ups: bool
+    missing_terms: list[str] = field(default_factory=list)
+    missing_topics: list[str] = field(default_factory=list)
+    problems: list[str] = field(default_factory=list)
+
+
+def key_terms(text: str) -> set[str]:
+    """Content words of a text, cut to a common stem so inflections still match"""
+    return {t[:STEM_LENGTH] for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOP_WORDS and len(t) > 2}
+
+
+def coverage(terms: set[str], covered: set[str]) -> float:
+    return len(terms & covered) / len(terms) if terms else 1.0
+
+
+def prescreen_report(report: ReportData, query: str, search_topics: list[str],
+                     thresholds: PrescreenThresholds, changed_sections: list[str] | None = None,
+                     previous: EvaluationResult | None = None) -> Prescreen:
+    """Score a report on length, sections, query term and search topic coverage and follow-up questions.
+
+    For revisions, pass the changed section headings and the previous evaluation so the report can be
+    recognised as clearly complete when the changes cover every missing aspect.
+    """
+    question = query.partition(CLARIFICATION_HEADING)[0]
+    markdown = report.markdown_report
+    words = len(markdown.split())
+    sections = [s for s in split_sections(markdown) if s.heading]
+    report_terms = key_terms(markdown)
+    query_terms = key_terms(question)
+    term_coverage = coverage(query_terms, report_terms)
+    missing_topics = [topic for topic in search_topics if coverage(key_terms(topic), report_terms) < 0.5]
+    topic_coverage = 1 - len(missing_topics) / len(search_topics) if search_topics else 1.0
+    has_follow_ups = bool(report.follow_up_questions)
+    score = (0.3 * min(1.0, words / thresholds.target_words)
+             + 0.15 * min(1.0, len(sections) / thresholds.min_sections)
+             + 0.25 * term_coverage
+             + 0.2 * topic_coverage
+             + 0.1 * has_follow_ups)
+    result = Prescreen(
+        verdict="unclear", score=round(score, 2), words=words, sections=len(sections),
+        term_coverage=round(term_coverage, 2), topic_coverage=round(topic_coverage, 2), has_follow_ups=has_follow_ups,
+        missing_terms=sorted({w for w in re.findall(r"[a-z0-9]+", question.lower())
+                              if w not in STOP_WORDS and len(w) > 2 and w[:STEM_LENGTH] not in report_terms}),
+        missing_topics=missing_topics,
+    )
+
+    if words < thresholds.fail_words:
+        result.problems.append(f"The report is far too short ({words} words, target {thresholds.target_words}+)")
+    if len(sections) < 2:
+        result.problems.append("The report has almost no section structure")
+    if term_coverage < thresholds.fail_term_coverage:
+        result.problems.append(f"The report does not cover key terms of the query: {', '.join(result.missing_terms)}")
+    if result.problems:
+        result.verdict = "fail"
+        return result
+
+    if previous is None or not changed_sections or previous.quality_score < thresholds.pass_previous_score:
+        return result
+    changed_keys = {heading_key(h) for h in changed_sections}
+    changed_terms = key_terms(" ".join(s.markdown for s in sections if heading_key(s.heading) in changed_keys))
+    aspects_covered = all(coverage(key_terms(aspect), changed_terms) >= thresholds.pass_term_coverage
+                          for aspect in previous.missing_aspects)
+    if (aspects_covered and words >= thresholds.target_words and len(sections) >= thresholds.min_sections
+            and term_coverage >= thresholds.pass_term_coverage and has_follow_ups and not missing_topics):
+        result.verdict = "pass"
+    return result
+
+
+def synthesize_evaluation(prescreen: Prescreen, query: str, quality_threshold: float) -> EvaluationResult:
+    """Build the evaluation the research manager receives when the pre-screen fails a report without the LLM"""
+    suggested = prescreen.missing_topics[:3] or ([query.splitlines()[0]] if prescreen.missing_terms else [])
+    return EvaluationResult(
+        quality_score=min(prescreen.score, max(0.0, quality_threshold - 0.2)),
+        is_complete=False,
+        missing_aspects=prescreen.problems + [f"Search topic not covered: {topic}" for topic in prescreen.missing_topics],
+        needs_more_searches=bool(suggested),
+        suggested_searches=suggested,
+        feedback=FEEDBACK_PREFIX + "; ".join(prescreen.problems) + ".",
+    )
+
+
+def is_synthesized_failure(evaluation: EvaluationResult) -> bool:
+    """Whether an evaluation is a failure synthesized by the pre-screen, whose score is capped below the
+    evaluator's scale and so cannot be compared with it"""
+    return not evaluation.is_complete and evaluation.feedback.startswith(FEEDBACK_PREFIX)
+
+
+def agreement(prescreen: Prescreen, evaluation: EvaluationResult, quality_threshold: float) -> str:
+    """Compare a clear-cut pre-screen verdict with the LLM evaluator's result"""
+    if prescreen.verdict == "unclear":
+        return "unclear"
+    passed = evaluation.is_complete and evaluation.quality_score >= quality_threshold
+    return "agreed" if passed == (prescreen.verdict == "pass") else "disagreed"
+
+
+def should_audit(thresholds: PrescreenThresholds) -> bool:
+    """Whether a clear failure should still be checked by the LLM evaluator"""
+    return random.random() < thresholds.audit_rate
@@ -0,0 +1,116 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class ProgressEvent:
+    """A progress update from a research run.
+
+    kind is one of "status" (a stage message), "report_delta" (more markdown of the report
+    being written), "report_reset" (a new report is being written) or "done". A "done" event
+    carries the final ReportData as report when the run finished with a report artifact, and is
+    partial when the run was cut short by its time, token or turn limit.
+    """
+    kind: str
+    text: str = ""
+    report: Any = None
+    partial: bool = False
+
+
+class ProgressReporter:
+    """Queue of progress events that tools publish to and the UI consumes"""
+
+    def __init__(self):
+        self._queue: asyncio.Queue[ProgressEvent | None] = asyncio.Queue()
+
+    def status(self, text: str) -> None:
+        self._queue.put_nowait(ProgressEvent("status", text))
+
+    def report_delta(self, text: str) -> None:
+        if text:
+            self._queue.put_nowait(ProgressEvent("report_delta", text))
+
+    def report_reset(self) -> None:
+        self._queue.put_nowait(ProgressEvent("report_reset"))
+
+    def done(self, text: str, report: Any = None, partial: bool = False) -> None:
+        self._queue.put_nowait(ProgressEvent("done", text, report, partial))
+
+    def close(self) -> None:
+        """Signal that no more events will be published"""
+        self._queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ProgressEvent:
+        event = await self._queue.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+
+class JsonStringFieldStream:
+    """Incrementally decode one string field out of a JSON object that is arriving in chunks.
+
+    Used to stream the markdown_report field of the writer's structured output as it is generated.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, field_name: str):
+        self._marker = f'"{field_name}"'
+        self._buffer = ""
+        self._pos = 0
+        self._in_value = False
+        self._finished = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of JSON and return any newly decoded text of the field"""
+        self._buffer += chunk
+        if self._finished:
+            return ""
+        if not self._in_value:
+            start = self._buffer.find(self._marker)
+            if start < 0:
+                return ""
+            i = start + len(self._marker)
+            while i < len(self._buffer) and self._buffer[i] in " \t\r\n:":
+                i += 1
+            if i >= len(self._buffer) or self._buffer[i] != '"':
+                return ""
+            self._pos = i + 1
+            self._in_value = True
+
+        out = []
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            c = buffer[self._pos]
+            if c == '"':
+                self._finished = True
+                break
+            if c != "\\":
+                out.append(c)
+                self._pos += 1
+                continue
+            if self._pos + 1 >= len(buffer):
+                break
+            escape = buffer[self._pos + 1]
+            if escape == "u":
+                if self._pos + 6 > len(buffer):
+                    break
+                code = int(buffer[self._pos + 2:self._pos + 6], 16)
+                if 0xD800 <= code < 0xDC00:
+                    # A surrogate pair needs the following \uXXXX escape before it can be decoded
+                    if self._pos + 12 > len(buffer):
+                        break
+                    low = int(buffer[self._pos + 8:self._pos + 12], 16)
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    self._pos += 6
+                out.append(chr(code))
+                self._pos += 6
+            else:
+                out.append(self._ESCAPES.get(escape, escape))
+                self._pos += 2
+        return "".join(out)
@@ -0,0 +1,63 @@
+from agents import Runner, RunContextWrapper, function_tool
+from .budget import stop_message
+from .context import ResearchContext
+from .optimizer import optimizer_agent
+from .planner import WebSearchPlan, planner_agent, planner_input
+
+
+@function_tool
+async def plan_searches(wrapper: RunContextWrapper[ResearchContext], query: str) -> str:
+    """Plan web searches for a research query. Returns a search plan with multiple search items, each containing a search query and reasoning.
+
+    Args:
+        query: The research query to plan searches for
+    """
+    context = wrapper.context
+    reason = context.budget.exhausted(wrapper.usage.total_tokens)
+    if reason is not None:
+        return stop_message(reason, context.artifacts)
+    if context.checkpoint is not None:
+        saved_plan = context.checkpoint.plan(query)
+        if saved_plan is not None:
+            return saved_plan.model_dump_json()
+    input_message = planner_input(query, context.budget)
+    speculative_plan = await context.speculation.plan() if context.speculation is not None else None
+    if speculative_plan is not None:
+        if context.speculation.matches(query):
+            context.progress.status("Using the search plan made while you answered the questions")
+            if context.checkpoint is not None:
+                context.checkpoint.save_plan(query, speculative_plan)
+            return speculative_plan.model_dump_json()
+        running = "\n".join(f"- {item.query}" for item in speculative_plan.searches)
+        input_message += (
+            f"\n\nThese searches are already running for an earlier version of the query:\n{running}\n"
+            "Repeat any that are still relevant to the query word for word, and replace the others."
+        )
+    result = await Runner.run(planner_agent, input_message, context=context, run_config=context.run_config)
+    context.budget.add_usage(result)
+    plan = result.final_output_as(WebSearchPlan)
+    if context.checkpoint is not None:
+        context.checkpoint.save_plan(query, plan)
+    return plan.model_dump_json()
+
+
+@function_tool
+async def refine_query(wrapper: RunContextWrapper[ResearchContext], query: str, evaluation_feedback: str) -> str:
+    """Refine a research query when the evaluation indicates the query itself is fundamentally flawed (too broad, too narrow, missing key concepts, or asking the wrong question). Use this ONLY when the evaluation's missing_aspects suggest the query needs to be restructured, not just when more searches are needed. Returns an improved, more focused query that addresses gaps and issues identified in the evaluation.
+
+    Args:
+        query: The current research query
+        evaluation_feedback: The evaluation's missing aspects and feedback that show what is wrong with the query
+    """
+    context = wrapper.context
+    reason = context.budget.exhausted(wrapper.usage.total_tokens)
+    if reason is not None:
+        return stop_message(reason, context.artifacts)
+    result = await Runner.run(
+        optimizer_agent,
+        f"Original query: {query}\n\nEvaluation feedback: {evaluation_feedback}",
+        context=context,
+        run_config=context.run_config,
+    )
+    context.budget.add_usage(result)
+    return str(result.final_output)
@@ -0,0 +1,152 @@
+import html
+import re
+
+EMAIL_STYLE = (
+    "body{font-family:-apple-system,Segoe UI,Helvetica,Arial,sans-serif;line-height:1.6;color:#222;"
+    "max-width:760px;margin:0 auto;padding:24px}"
+    "h1,h2,h3,h4{line-height:1.3;color:#111}"
+    "code{background:#f4f4f4;padding:1px 4px;border-radius:3px}"
+    "pre{background:#f4f4f4;padding:12px;overflow-x:auto}"
+    "blockquote{border-left:4px solid #ddd;margin:0;padding-left:16px;color:#555}"
+    "table{border-collapse:collapse}th,td{border:1px solid #ddd;padding:6px 10px;text-align:left}"
+)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_TABLE_DIVIDER = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+# Link targets may contain balanced parentheses, e.g. https://en.wikipedia.org/wiki/Mercury_(planet)
+_LINK = re.compile(r"\[([^\]]+)\]\(((?:[^()\s]|\([^()\s]*\))+)\)")
+# Any other scheme (javascript:, data:, ...) is dropped and only the link text is kept
+_SAFE_URL = re.compile(r"^(https?://|mailto:)", re.IGNORECASE)
+
+
+def render_inline(text: str) -> str:
+    """Render inline markdown (code, links, bold, italic) to HTML, escaping everything else"""
+    placeholders = []
+
+    def stash(fragment: str) -> str:
+        placeholders.append(fragment)
+        return f"\x00{len(placeholders) - 1}\x00"
+
+    def link(match: re.Match) -> str:
+        label = render_inline(match.group(1))
+        if not _SAFE_URL.match(match.group(2)):
+            return stash(label)
+        return stash(f'<a href="{html.escape(match.group(2), quote=True)}">{label}</a>')
+
+    text = re.sub(r"`([^`]+)`", lambda m: stash(f"<code>{html.escape(m.group(1))}</code>"), text)
+    text = _LINK.sub(link, text)
+    text = html.escape(text, quote=False)
+    text = re.sub(r"\*\*(.+?)\*\*|__(.+?)__", lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)",
+                  lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: placeholders[int(m.group(1))], text)
+
+
+def _table_cells(line: str) -> list[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _render_list(lines: list[str]) -> str:
+    """Render consecutive list item lines, nesting items by indentation"""
+    out = []
+    stack: list[tuple[int, str]] = []
+    for line in lines:
+        match = _LIST_ITEM.match(line)
+        if not match:
+            # Continuation of the previous item
+            out[-1] += " " + render_inline(line.strip())
+            continue
+        indent = len(match.group(1).expandtabs(4))
+        tag = "ul" if match.group(2) in "-*+" else "ol"
+        if not stack or indent > stack[-1][0]:
+            stack.append((indent, tag))
+            out.append(f"<{tag}>")
+        else:
+            while len(stack) > 1 and indent < stack[-1][0]:
+                out.append(f"</li></{stack.pop()[1]}>")
+            if tag != stack[-1][1]:
+                # A different kind of marker at the same indent starts a new list
+                out.append(f"</li></{stack.pop()[1]}>")
+                stack.append((indent, tag))
+                out.append(f"<{tag}>")
+            else:
+                out.append("</li>")
+        out.append(f"<li>{render_inline(match.group(3))}")
+    while stack:
+        out.append(f"</li></{stack.pop()[1]}>")
+    return "\n".join(out)
+
+
+def markdown_to_html(markdown: str) -> str:
+    """Render the markdown used in research reports to HTML.
+
+    Supports headings, paragraphs, nested lists, block quotes, fenced code, horizontal rules,
+    tables and inline code, links, bold and italic. Output is deterministic for a given input.
+    """
+    lines = markdown.replace("\r\n", "\n").split("\n")
+    blocks = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+        elif stripped.startswith("```"):
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                code.append(lines[i])
+                i += 1
+            i += 1
+            blocks.append(f"<pre><code>{html.escape(chr(10).join(code))}</code></pre>")
+        elif _HEADING.match(stripped):
+            match = _HEADING.match(stripped)
+            level = len(match.group(1))
+            blocks.append(f"<h{level}>{render_inline(match.group(2))}</h{level}>")
+            i += 1
+        elif _RULE.match(line):
+            blocks.append("<hr>")
+            i += 1
+        elif stripped.startswith(">"):
+            quoted = []
+            while i < len(lines) and lines[i].strip().startswith(">"):
+                quoted.append(lines[i].strip()[1:].lstrip())
+                i += 1
+            blocks.append(f"<blockquote>{markdown_to_html(chr(10).join(quoted))}</blockquote>")
+        elif "|" in stripped and i + 1 < len(lines) and _TABLE_DIVIDER.match(lines[i + 1]):
+            header = "".join(f"<th>{render_inline(c)}</th>" for c in _table_cells(line))
+            rows = []
+            i += 2
+            while i < len(lines) and "|" in lines[i] and lines[i].strip():
+                rows.append("<tr>" + "".join(f"<td>{render_inline(c)}</td>" for c in _table_cells(lines[i])) + "</tr>")
+                i += 1
+            blocks.append(f"<table><thead><tr>{header}</tr></thead><tbody>{''.join(rows)}</tbody></table>")
+        elif _LIST_ITEM.match(line):
+            items = []
+            while i < len(lines) and lines[i].strip() and (
+                _LIST_ITEM.match(lines[i]) or (lines[i].startswith((" ", "\t")) and items)
+            ):
+                items.append(lines[i])
+                i += 1
+            blocks.append(_render_list(items))
+        else:
+            paragraph = []
+            while i < len(lines) and lines[i].strip() and not (
+                _HEADING.match(lines[i].strip()) or _LIST_ITEM.match(lines[i]) or lines[i].strip().startswith(("```", ">"))
+                or _RULE.match(lines[i])
+            ):
+                paragraph.append(lines[i].strip())
+                i += 1
+            blocks.append(f"<p>{render_inline(' '.join(paragraph))}</p>")
+    return "\n".join(blocks)
+
+
+def render_email(markdown: str, title: str) -> str:
+    """Wrap a rendered report in a standalone HTML email document"""
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title><style>{EMAIL_STYLE}</style></head>"
+        f"<body>{markdown_to_html(markdown)}</body></html>"
+    )
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+
+from .evaluator import evaluator_agent
+from .research_manager import research_manager
+from .reviser import reviser_agent
+from .search_cache import SEARCH_CACHE_DIR, normalize_query
+from .sqlite_cache import SQLiteCache
+from .writer import writer_agent
+
+REPORT_CACHE_TTL_SECONDS = 24 * 60 * 60
+REPORT_CACHE_MAX_ENTRIES = 500
+
+_END = object()
+
+
+def report_pipeline_config() -> dict:
+    """Describe the agents that shape a report, so changing their instructions or models invalidates cached reports"""
+    return {
+        agent.name: {
+            "instructions": hashlib.sha256(str(agent.instructions).encode("utf-8")).hexdigest(),
+            "model": str(agent.model),
+        }
+        for agent in (research_manager, writer_agent, reviser_agent, evaluator_agent)
+    }
+
+
+def report_cache_key(refined_query: str) -> str:
+    """Build a cache key from the normalized refined query and the report pipeline's configuration"""
+    payload = json.dumps({"query": normalize_query(refined_query), "pipeline": report_pipeline_config()}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedReport:
+    report: str
+    created_at: float
+
+
+class ReportCache(SQLiteCache):
+    """SQLite-backed cache of finished reports with a per-entry TTL and LRU eviction"""
+
+    table = "report_cache"
+    value_column = "report"
+
+    def __init__(self, directory: str | None = None, ttl_seconds: float = REPORT_CACHE_TTL_SECONDS,
+                 max_entries: int = REPORT_CACHE_MAX_ENTRIES):
+        directory = directory or os.environ.get("REPORT_CACHE_DIR", SEARCH_CACHE_DIR)
+        super().__init__(os.path.join(directory, "report_cache.sqlite3"), ttl_seconds, max_entries)
+
+    def get(self, key: str) -> CachedReport | None:
+        """Return the cached report for key, or None if it is missing or expired"""
+        entry = self.get_entry(key)
+        return CachedReport(report=entry[0], created_at=entry[1]) if entry else None
+
+
+@dataclass
+class _Flight:
+    session_id: str
+    history: list[Any] = field(default_factory=list)
+    subscribers: dict[asyncio.Queue, str] = field(default_factory=dict)
+    task: asyncio.Task | None = None
+
+
+class ReportFlights:
+    """Single-flight coalescing of research runs for the same cache key.
+
+    The first request for a key starts the run; concurrent requests for the same key attach to it and
+    receive every event from the start, so all of them stream the same progress and report. Only the
+    request that starts a run is admitted by the scheduler, so a rejection never reaches another
+    session. Finished reports are written to the report cache unless the run was cut short by its limits.
+    """
+
+    def __init__(self, cache: ReportCache):
+        self.cache = cache
+        self.coalesced = 0
+        self._flights: dict[str, _Flight] = {}
+
+    async def join(self, key: str, query: str, session_id: str, start: Callable[[], AsyncIterator[Any]],
+                   admit: Callable[[], None] | None = None) -> AsyncIterator[Any]:
+        """Yield the events of the in-flight run for key, starting it with start() if there is none.
+
+        admit() is called before a new run's flight is created and may raise, e.g. JobScheduler.reserve
+        raising JobRejected; requests that attach to a run already in flight are not admitted again.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            if admit is not None:
+                admit()
+            flight = self._flights[key] = _Flight(session_id)
+            flight.task = asyncio.create_task(self._pump(key, query, flight, start()))
+        else:
+            self.coalesced += 1
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in flight.history:
+            queue.put_nowait(item)
+        flight.subscribers[queue] = session_id
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            flight.subscribers.pop(queue, None)
+
+    def has_followers(self, session_id: str) -> bool:
+        """Whether another session is attached to a run this session started"""
+        return any(
+            flight.session_id == session_id and any(s != session_id for s in flight.subscribers.values())
+            for flight in self._flights.values()
+        )
+
+    async def _pump(self, key: str, query: str, flight: _Flight, source: AsyncIterator[Any]) -> None:
+        end: Any = _END
+        try:
+            async for item in source:
+                flight.history.append(item)
+                for queue in flight.subscribers:
+                    queue.put_nowait(item)
+                if getattr(item, "kind", None) == "done" and item.report is not None and not item.partial:
+                    self.cache.put(key, query, item.text)
+        except Exception as e:
+            end = e
+        finally:
+            self._flights.pop(key, None)
+            flight.history.append(end)
+            for queue in flight.subscribers:
+                queue.put_nowait(end)
+
+
+_report_cache: ReportCache | None = None
+_report_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    """Return the process-wide report cache, creating it on first use"""
+    global _report_cache
+    with _report_cache_lock:
+        if _report_cache is None:
+            _report_cache = ReportCache()
+        return _report_cache
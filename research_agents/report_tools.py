@@ -0,0 +1,181 @@
+from agents import Runner, RunContextWrapper, function_tool
+from .artifacts import Artifact
+from .budget import stop_message
+from .context import ResearchContext
+from .evaluator import EvaluationResult, evaluator_agent
+from .evidence import format_evidence
+from .metrics import get_metrics
+from .prescreen import agreement, is_synthesized_failure, prescreen_report, should_audit, synthesize_evaluation
+from .progress import JsonStringFieldStream
+from .reviser import ReportRevision, format_outline, heading_key, related_sections, reviser_agent, splice_sections, split_sections
+from .writer import ReportData, writer_agent
+
+
+def resolve_searches(context: ResearchContext, search_handles: list[str]) -> list[Artifact]:
+    """Look up the searches behind a list of handles"""
+    return [context.artifacts.get(handle, "search") for handle in search_handles]
+
+
+def describe_report(artifact: Artifact) -> str:
+    """Summarize a stored report for the research manager"""
+    report: ReportData = artifact.value
+    headings = "; ".join(s.heading for s in split_sections(report.markdown_report) if s.heading)
+    return (f"{artifact.handle}: {len(report.markdown_report.split())} words. "
+            f"Summary: {report.short_summary}\nSections: {headings}")
+
+
+@function_tool
+async def write_report(wrapper: RunContextWrapper[ResearchContext], query: str, search_handles: list[str]) -> str:
+    """Write a comprehensive research report (5-10 pages, 1000+ words) based on the query and search results. Returns the report's handle, a short summary and its section headings.
+
+    Args:
+        query: The research query
+        search_handles: Handles of the search summaries to base the report on, e.g. ["search-1", "search-2"]
+    """
+    context = wrapper.context
+    reason = context.budget.exhausted(wrapper.usage.total_tokens)
+    # Writing is still allowed when the budget runs out before the first report, so the run has something to return
+    if reason is not None and context.artifacts.latest("report") is not None:
+        return stop_message(reason, context.artifacts)
+    searches = resolve_searches(context, search_handles)
+    # The passages best matching the query and each search topic, which the writer's sections follow
+    passages = context.evidence.retrieve([query] + [search.label for search in searches],
+                                         handles={search.handle for search in searches})
+    progress = context.progress
+    progress.status("Writing report...")
+    progress.report_reset()
+    result = Runner.run_streamed(
+        writer_agent,
+        f"Original query: {query}\nRelevant passages from the searches:\n{format_evidence(passages)}",
+        context=context,
+        run_config=context.run_config,
+    )
+    markdown = JsonStringFieldStream("markdown_report")
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and event.data.type == "response.output_text.delta":
+            progress.report_delta(markdown.feed(event.data.delta))
+    context.budget.add_usage(result)
+    report = result.final_output_as(ReportData)
+    artifact = context.artifacts.put("report", report, report.short_summary)
+    progress.status(f"Report written ({len(report.markdown_report.split())} words)")
+    return describe_report(artifact)
+
+
+@function_tool
+async def revise_report(wrapper: RunContextWrapper[ResearchContext], query: str, report_handle: str, missing_aspects: list[str], search_handles: list[str]) -> str:
+    """Revise a report by rewriting or adding only the sections that cover the missing aspects, instead of rewriting the whole report. Returns the revised report's handle and the changed sections.
+
+    Args:
+        query: The research query
+        report_handle: Handle of the report to revise
+        missing_aspects: The missing aspects from the report's evaluation
+        search_handles: Handles of the new search summaries that cover those aspects
+    """
+    context = wrapper.context
+    reason = context.budget.exhausted(wrapper.usage.total_tokens)
+    if reason is not None:
+        return stop_message(reason, context.artifacts)
+    base = context.artifacts.get(report_handle, "report")
+    searches = resolve_searches(context, search_handles)
+    # Evidence for each missing aspect may come from any round of searches, not only the new ones
+    passages = context.evidence.retrieve(missing_aspects + [search.label for search in searches])
+    progress = context.progress
+    progress.status("Revising report...")
+    sections = split_sections(base.value.markdown_report)
+    related = related_sections(sections, missing_aspects)
+    related_text = "\n\n".join(s.markdown for s in related) or "(no closely related sections)"
+    result = await Runner.run(
+        reviser_agent,
+        f"Original query: {query}\n\n"
+        f"Outline of the current report:\n{format_outline(sections)}\n\n"
+        f"Current text of the most related sections:\n{related_text}\n\n"
+        f"Missing aspects to cover:\n" + "\n".join(f"- {aspect}" for aspect in missing_aspects) + "\n\n"
+        f"Relevant passages from the searches:\n{format_evidence(passages)}",
+        context=context,
+        run_config=context.run_config,
+    )
+    context.budget.add_usage(result)
+    revision = result.final_output_as(ReportRevision)
+    markdown, changed = splice_sections(sections, revision.sections)
+    report = ReportData(
+        short_summary=revision.short_summary,
+        markdown_report=markdown,
+        follow_up_questions=revision.follow_up_questions,
+    )
+    # Changes are tracked relative to the last evaluated version so evaluate_report can re-check only them
+    if context.artifacts.find("evaluation", parent=base.handle) is not None:
+        parent, changed_sections = base.handle, changed
+    elif base.parent is not None:
+        parent, changed_sections = base.parent, base.changed_sections + changed
+    else:
+        parent, changed_sections = None, []
+    artifact = context.artifacts.put("report", report, report.short_summary, parent=parent, changed_sections=changed_sections)
+    progress.report_reset()
+    progress.report_delta(markdown)
+    progress.status(f"Report revised: {len(changed)} sections updated")
+    return f"{describe_report(artifact)}\nChanged sections: {'; '.join(changed) or 'none'}"
+
+
+async def run_evaluator(context: ResearchContext, query: str, artifact: Artifact, previous: Artifact | None) -> EvaluationResult:
+    """Evaluate a report with the LLM evaluator, re-checking only the changed sections when a previous evaluation exists"""
+    markdown = artifact.value.markdown_report
+    if previous is not None:
+        sections = split_sections(markdown)
+        changed_keys = {heading_key(h) for h in artifact.changed_sections}
+        changed_text = "\n\n".join(s.markdown for s in sections if heading_key(s.heading) in changed_keys)
+        input_message = (
+            f"Original query: {query}\n\n"
+            "This is a revision of a report you already evaluated.\n"
+            f"Previous evaluation:\n{previous.value.model_dump_json()}\n\n"
+            f"Outline of the revised report:\n{format_outline(sections)}\n\n"
+            "Only the following sections changed. Judge whether they address the previously missing aspects "
+            f"and return an updated evaluation of the whole report:\n\n{changed_text}"
+        )
+    else:
+        input_message = f"Original query: {query}\n\nReport:\n{markdown}"
+    result = await Runner.run(evaluator_agent, input_message, context=context, run_config=context.run_config)
+    context.budget.add_usage(result)
+    return result.final_output_as(EvaluationResult)
+
+
+@function_tool
+async def evaluate_report(wrapper: RunContextWrapper[ResearchContext], query: str, report_handle: str) -> str:
+    """Evaluate the quality and completeness of a report. Revised reports are evaluated by re-checking only their changed sections. Returns the quality score (0.0-1.0), completeness check, missing aspects, and suggested searches.
+
+    Args:
+        query: The research query the report should answer
+        report_handle: Handle of the report to evaluate
+    """
+    context = wrapper.context
+    reason = context.budget.exhausted(wrapper.usage.total_tokens)
+    if reason is not None:
+        return stop_message(reason, context.artifacts)
+    artifact = context.artifacts.get(report_handle, "report")
+    previous = None
+    if artifact.parent is not None and artifact.changed_sections:
+        previous = context.artifacts.find("evaluation", parent=artifact.parent)
+    evaluation, screen, source = None, None, ""
+    if context.prescreen is not None:
+        topics = [search.label for search in context.artifacts.all("search")]
+        screen = prescreen_report(artifact.value, query, topics, context.prescreen, artifact.changed_sections,
+                                  previous.value if previous else None)
+        if screen.verdict == "fail" and not should_audit(context.prescreen):
+            evaluation = synthesize_evaluation(screen, query, context.budget.quality_threshold)
+            get_metrics().record_prescreen(screen.verdict, "skipped")
+            source = ", local pre-screen"
+    if evaluation is None:
+        evaluation = await run_evaluator(context, query, artifact, previous)
+        if screen is not None:
+            get_metrics().record_prescreen(screen.verdict, agreement(screen, evaluation, context.budget.quality_threshold))
+    context.artifacts.put("evaluation", evaluation, evaluation.feedback, parent=artifact.handle)
+    status = "complete" if evaluation.is_complete else "incomplete"
+    context.progress.status(f"Evaluation: quality score {evaluation.quality_score:.2f} ({status}{source})")
+    output = f"Evaluation of {artifact.handle}: {evaluation.model_dump_json(exclude={'feedback'})}"
+    reason = (context.budget.record_evaluation(evaluation.quality_score, evaluation.is_complete,
+                                               comparable=not is_synthesized_failure(evaluation))
+              or context.budget.exhausted(wrapper.usage.total_tokens))
+    if reason is not None:
+        if reason != "quality threshold reached":
+            context.progress.status(f"Stopping: {reason}")
+        output += f"\n{stop_message(reason, context.artifacts)}"
+    return output
@@ -0,0 +1,110 @@
+import re
+
+from pydantic import BaseModel, Field
+from agents import Agent
+from .dedup import STOP_WORDS
+from .models import model_for
+
+MAX_SECTIONS_TO_REVISE = 3
+
+INSTRUCTIONS = (
+    "You are a senior researcher revising an existing research report. "
+    "You will be given the original query, the outline of the current report, the full text of the "
+    "sections most related to the gaps found by a reviewer, the missing aspects to cover, and the research "
+    "passages most relevant to them, with their source URLs.\n"
+    "Only output the sections that need to change: rewrite an existing section to cover a missing aspect "
+    "(keeping its existing content unless it is wrong), or add a new section when no existing section fits. "
+    "Use an existing heading exactly when rewriting that section. Each section must be detailed markdown "
+    "starting with its '## ' heading. Cite the sources of the passages you use as inline markdown links. "
+    "Do not output sections that do not need to change."
+)
+
+
+class SectionUpdate(BaseModel):
+    heading: str = Field(description="The section heading without leading '#'. Use an existing heading exactly to replace that section, or a new heading to add a section")
+    markdown: str = Field(description="The full markdown of the section, starting with its heading")
+
+
+class ReportRevision(BaseModel):
+    sections: list[SectionUpdate] = Field(description="Only the sections that were rewritten or added")
+    short_summary: str = Field(description="An updated 2-3 sentence summary of the findings of the whole report")
+    follow_up_questions: list[str] = Field(description="Suggested topics to research further")
+
+
+class ReportSection(BaseModel):
+    heading: str = Field(description="The section heading without leading '#', empty for text before the first heading")
+    markdown: str = Field(description="The full markdown of the section, including its heading line")
+
+
+def heading_key(heading: str) -> str:
+    """Normalize a heading so that small formatting differences still match"""
+    return re.sub(r"[^a-z0-9]+", " ", heading.lower()).strip()
+
+
+def _tokens(text: str) -> set[str]:
+    return {t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOP_WORDS and len(t) > 2}
+
+
+def split_sections(markdown: str) -> list[ReportSection]:
+    """Split a report into its top-level sections ('## ' headings, or '# ' if there are none)"""
+    level = "##" if re.search(r"^## ", markdown, re.MULTILINE) else "#"
+    pattern = re.compile(rf"^{level} (.+)$", re.MULTILINE)
+    sections = []
+    matches = list(pattern.finditer(markdown))
+    if not matches or matches[0].start() > 0:
+        end = matches[0].start() if matches else len(markdown)
+        sections.append(ReportSection(heading="", markdown=markdown[:end].rstrip() + "\n"))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        sections.append(ReportSection(heading=match.group(1).strip(), markdown=markdown[match.start():end].rstrip() + "\n"))
+    return sections
+
+
+def format_outline(sections: list[ReportSection]) -> str:
+    """List the section headings of a report"""
+    return "\n".join(f"- {s.heading}" for s in sections if s.heading)
+
+
+def related_sections(sections: list[ReportSection], aspects: list[str], limit: int = MAX_SECTIONS_TO_REVISE) -> list[ReportSection]:
+    """Pick the sections whose text shares the most terms with the missing aspects"""
+    aspect_tokens = _tokens(" ".join(aspects))
+    scored = [(len(aspect_tokens & _tokens(s.markdown)), s) for s in sections if s.heading]
+    scored = [(score, s) for score, s in scored if score > 0]
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [s for _, s in scored[:limit]]
+
+
+def splice_sections(sections: list[ReportSection], updates: list[SectionUpdate]) -> tuple[str, list[str]]:
+    """Replace or insert updated sections, returning the new markdown and the changed headings.
+
+    New sections go before a closing conclusion/references section if there is one.
+    """
+    result = list(sections)
+    index = {heading_key(s.heading): i for i, s in enumerate(result) if s.heading}
+    changed = []
+    for update in updates:
+        markdown = update.markdown.strip()
+        if not markdown.startswith("#"):
+            markdown = f"## {update.heading}\n\n{markdown}"
+        section = ReportSection(heading=update.heading, markdown=markdown + "\n")
+        key = heading_key(update.heading)
+        if key in index:
+            result[index[key]] = section
+        else:
+            insert_at = len(result)
+            for i, s in enumerate(result):
+                if re.search(r"conclusion|references|sources|further research", s.heading, re.IGNORECASE):
+                    insert_at = i
+                    break
+            result.insert(insert_at, section)
+            index = {heading_key(s.heading): i for i, s in enumerate(result) if s.heading}
+        changed.append(update.heading)
+    return "\n".join(s.markdown for s in result), changed
+
+
+reviser_agent = Agent(
+    name="ReviserAgent",
+    instructions=INSTRUCTIONS,
+    model=model_for("reviser"),
+    output_type=ReportRevision,
+)
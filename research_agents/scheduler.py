@@ -0,0 +1,167 @@
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+from .metrics import get_metrics
+
+MAX_WORKERS = 4
+MAX_JOBS_PER_SESSION = 1
+MAX_QUEUED_JOBS = 20
+DEFAULT_JOB_SECONDS = 180.0
+STATUS_INTERVAL_SECONDS = 2.0
+
+_DONE = object()
+
+
+class JobRejected(Exception):
+    """Raised when a job cannot be admitted, e.g. because the queue is full"""
+
+
+@dataclass
+class QueueStatus:
+    """Yielded while a job waits for a worker"""
+    position: int
+    eta_seconds: float
+
+
+class JobScheduler:
+    """Bounded worker pool for research runs with per-session limits and a bounded FIFO queue.
+
+    Jobs are async iterators; submit() yields QueueStatus updates while a job waits for a worker
+    and then the job's own items. Each job runs in its own task so a whole session's jobs can be
+    cancelled, e.g. when the browser goes away.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_jobs_per_session: int = MAX_JOBS_PER_SESSION,
+                 max_queued_jobs: int = MAX_QUEUED_JOBS):
+        self.max_workers = max_workers
+        self.max_jobs_per_session = max_jobs_per_session
+        self.max_queued_jobs = max_queued_jobs
+        self._free_workers = max_workers
+        self._waiters: deque[asyncio.Future] = deque()
+        self._sessions: dict[str, set[asyncio.Task]] = {}
+        self._reserved: Counter[str] = Counter()
+        self._durations: deque[float] = deque(maxlen=20)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    @property
+    def running(self) -> int:
+        return self.max_workers - self._free_workers
+
+    async def submit(self, session_id: str, job: Callable[[], AsyncIterator[Any]],
+                     reserved: bool = False) -> AsyncIterator[Any]:
+        """Admit a job for a session and yield its queue position updates followed by its items.
+
+        Raises JobRejected immediately if the session is at its limit or the queue is full. Pass
+        reserved=True to use a slot taken earlier with reserve() instead.
+        """
+        if reserved:
+            self.release_reservation(session_id)
+        else:
+            self.check_admission(session_id)
+        tasks = self._sessions.setdefault(session_id, set())
+        output: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self._run_job(job, output))
+        # Also ends the stream when the job is cancelled through cancel_session
+        task.add_done_callback(lambda _: output.put_nowait(_DONE))
+        tasks.add(task)
+        try:
+            while True:
+                item = await output.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            task.cancel()
+            tasks.discard(task)
+            if not tasks:
+                self._sessions.pop(session_id, None)
+
+    def check_admission(self, session_id: str) -> None:
+        """Raise JobRejected if a job for the session would not be admitted right now"""
+        if len(self._sessions.get(session_id, ())) + self._reserved[session_id] >= self.max_jobs_per_session:
+            raise JobRejected("You already have a research run in progress. Please wait for it to finish.")
+        admitted = sum(len(session_tasks) for session_tasks in self._sessions.values()) + self._reserved.total()
+        if admitted >= self.max_workers + self.max_queued_jobs:
+            raise JobRejected("The research queue is full. Please try again in a few minutes.")
+
+    def reserve(self, session_id: str) -> None:
+        """Admit a job now and hold its slot until it is submitted with reserved=True.
+
+        For callers that answer a request before the job's submit() starts, so a burst of requests
+        cannot all pass the admission check.
+        """
+        self.check_admission(session_id)
+        self._reserved[session_id] += 1
+
+    def release_reservation(self, session_id: str) -> None:
+        self._reserved[session_id] -= 1
+        if self._reserved[session_id] <= 0:
+            del self._reserved[session_id]
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel every queued or running job of a session, returning how many were cancelled"""
+        tasks = self._sessions.get(session_id, set())
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def eta_seconds(self, position: int) -> float:
+        """Estimate the wait for a queue position from recent job durations"""
+        average = sum(self._durations) / len(self._durations) if self._durations else DEFAULT_JOB_SECONDS
+        return average * math.ceil(position / self.max_workers)
+
+    async def _run_job(self, job: Callable[[], AsyncIterator[Any]], output: asyncio.Queue) -> None:
+        try:
+            submitted = time.monotonic()
+            await self._acquire(output)
+            started = time.monotonic()
+            get_metrics().record_queue_wait(started - submitted)
+            try:
+                async for item in job():
+                    output.put_nowait(item)
+            finally:
+                self._durations.append(time.monotonic() - started)
+                self._release()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            output.put_nowait(e)
+
+    async def _acquire(self, output: asyncio.Queue) -> None:
+        if self._free_workers > 0 and not self.queued:
+            self._free_workers -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            while not waiter.done():
+                position = [w for w in self._waiters if not w.done()].index(waiter) + 1
+                output.put_nowait(QueueStatus(position=position, eta_seconds=self.eta_seconds(position)))
+                await asyncio.wait({waiter}, timeout=STATUS_INTERVAL_SECONDS)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The worker was handed over to us just as we were cancelled
+                self._release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free_workers += 1
@@ -1,4 +1,5 @@
 from agents import Agent, WebSearchTool, ModelSettings
+from .models import model_for
 
 INSTRUCTIONS = (
     "You are a research assistant. Given a search term, you search the web for that term and "
@@ -12,6 +13,6 @@ search_agent = Agent(
     name="Search agent",
     instructions=INSTRUCTIONS,
     tools=[WebSearchTool(search_context_size="low")],
-    model="gpt-4o-mini",
+    model=model_for("search"),
     model_settings=ModelSettings(tool_choice="required"),
 )
@@ -0,0 +1,52 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+from .sqlite_cache import SQLiteCache
+
+SEARCH_CACHE_DIR = ".cache"
+SEARCH_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+SEARCH_CACHE_MAX_ENTRIES = 5000
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase the query, strip punctuation at the edges and collapse whitespace"""
+    return re.sub(r"\s+", " ", query.lower()).strip(" \t\n.,;:!?\"'")
+
+
+def cache_key(query: str, agent_config: dict) -> str:
+    """Build a cache key from the normalized query and the search agent's configuration"""
+    payload = json.dumps({"query": normalize_query(query), "agent": agent_config}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SearchCache(SQLiteCache):
+    """SQLite-backed cache of search summaries with a per-entry TTL and LRU eviction"""
+
+    table = "search_cache"
+    value_column = "summary"
+
+    def __init__(self, directory: str | None = None, ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS,
+                 max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        directory = directory or os.environ.get("SEARCH_CACHE_DIR", SEARCH_CACHE_DIR)
+        super().__init__(os.path.join(directory, "search_cache.sqlite3"), ttl_seconds, max_entries)
+
+    def get(self, key: str) -> str | None:
+        """Return the cached summary for key, or None if it is missing or expired"""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+
+_search_cache: SearchCache | None = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache, creating it on first use"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
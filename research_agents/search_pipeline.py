@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+
+from pydantic import BaseModel, Field
+from agents import Runner, RunContextWrapper, WebSearchTool, function_tool
+from .artifacts import make_digest
+from .budget import stop_message
+from .context import ResearchContext
+from .metrics import get_metrics
+from .planner import WebSearchItem, by_priority
+from .search import search_agent
+from .search_cache import cache_key, get_search_cache, normalize_query
+
+
+class SearchResult(BaseModel):
+    query: str = Field(description="The search term that was run")
+    summary: str | None = Field(default=None, description="The search summary, if the search succeeded")
+    error: str | None = Field(default=None, description="Why the search failed, if it did")
+    duplicate_of: str | None = Field(default=None, description="The earlier query this search was skipped in favour of")
+
+
+def search_agent_config() -> dict:
+    """Describe the search agent settings that affect its summaries, for use in cache keys"""
+    return {
+        "instructions": hashlib.sha256(str(search_agent.instructions).encode("utf-8")).hexdigest(),
+        "model": str(search_agent.model),
+        "search_context_size": [
+            tool.search_context_size for tool in search_agent.tools if isinstance(tool, WebSearchTool)
+        ],
+    }
+
+
+def with_sources(summary: str, result) -> str:
+    """Append the URLs the search agent cited to its summary, so they are cached and kept for citations"""
+    sources = {}
+    for response in result.raw_responses:
+        for item in response.output:
+            for content in getattr(item, "content", None) or []:
+                for annotation in getattr(content, "annotations", None) or []:
+                    if annotation.type == "url_citation" and annotation.url not in summary:
+                        sources.setdefault(annotation.url, annotation.title)
+    if not sources:
+        return summary
+    return summary + "\n\nSources:\n" + "\n".join(f"- [{title}]({url})" for url, title in sources.items())
+
+
+async def run_search(item: WebSearchItem, context: ResearchContext) -> SearchResult:
+    """Run a single search through the search agent, capturing timeouts and errors.
+
+    Summaries are served from and written to the search cache unless the run bypasses it.
+    """
+    cache = context.search_cache or get_search_cache()
+    key = cache_key(item.query, search_agent_config())
+    if not context.bypass_search_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return SearchResult(query=item.query, summary=cached)
+
+    input_message = f"Search term: {item.query}\nReason for searching: {item.reason}"
+    try:
+        result = await asyncio.wait_for(
+            Runner.run(search_agent, input_message, context=context, run_config=context.run_config),
+            timeout=context.search_timeout,
+        )
+        context.budget.add_usage(result)
+        summary = with_sources(str(result.final_output), result)
+        cache.put(key, item.query, summary)
+        return SearchResult(query=item.query, summary=summary)
+    except asyncio.TimeoutError:
+        return SearchResult(query=item.query, error=f"timed out after {context.search_timeout:.0f}s")
+    except Exception as e:
+        return SearchResult(query=item.query, error=str(e))
+
+
+async def take_speculative_result(item: WebSearchItem, context: ResearchContext) -> SearchResult | None:
+    """Wait for the search started speculatively for this item, if any; failed speculative searches are run again"""
+    task = context.speculation.take(item.query) if context.speculation is not None else None
+    if task is None:
+        return None
+    result = await task
+    return SearchResult(query=item.query, summary=result.summary) if result.error is None else None
+
+
+def take_checkpointed_result(item: WebSearchItem, context: ResearchContext) -> SearchResult | None:
+    """Reuse the summary of a search that finished in an earlier attempt of the run, if any"""
+    summary = context.checkpoint.search_summary(item.query) if context.checkpoint is not None else None
+    return SearchResult(query=item.query, summary=summary) if summary is not None else None
+
+
+async def run_searches(searches: list[WebSearchItem], context: ResearchContext) -> list[SearchResult]:
+    """Run all searches concurrently, at most context.max_concurrent_searches at a time.
+
+    Searches that are near-duplicates of ones already run in this research run are skipped.
+    """
+    duplicates = context.deduplicator.filter(searches)
+    kept = [item for item, duplicate_of in zip(searches, duplicates) if duplicate_of is None]
+    if len(kept) < len(searches):
+        context.progress.status(f"Skipped {len(searches) - len(kept)} near-duplicate searches")
+    context.budget.searches += len(kept)
+    semaphore = asyncio.Semaphore(max(1, context.max_concurrent_searches))
+    finished = 0
+
+    async def bounded(item: WebSearchItem) -> SearchResult:
+        nonlocal finished
+        query = normalize_query(item.query)
+        if query in context.failed_searches:
+            get_metrics().record_retry("search")
+        result = take_checkpointed_result(item, context) or await take_speculative_result(item, context)
+        if result is None:
+            async with semaphore:
+                result = await run_search(item, context)
+        if result.error is not None:
+            context.deduplicator.forget(item.query)
+            context.failed_searches.add(query)
+        else:
+            context.failed_searches.discard(query)
+            if context.checkpoint is not None:
+                context.checkpoint.save_search(item.query, result.summary)
+        finished += 1
+        outcome = "failed" if result.error is not None else "done"
+        context.progress.status(f"Search {finished}/{len(kept)} {outcome}: {item.query}")
+        return result
+
+    completed = await asyncio.gather(*(bounded(item) for item in kept))
+    failed = {item.query for item, result in zip(kept, completed) if result.error is not None}
+    completed = iter(completed)
+    results = [
+        next(completed) if duplicate_of is None else SearchResult(query=item.query, duplicate_of=duplicate_of)
+        for item, duplicate_of in zip(searches, duplicates)
+    ]
+    # A search skipped in favour of one that failed in this batch has nothing to point at, so it runs after all
+    orphaned = [i for i, result in enumerate(results) if result.duplicate_of in failed]
+    if orphaned:
+        context.deduplicator.saved -= len(orphaned)
+        retried = await run_searches([searches[i] for i in orphaned], context)
+        for i, result in zip(orphaned, retried):
+            results[i] = result
+    return results
+
+
+def format_results(results: list[SearchResult], context: ResearchContext) -> str:
+    """Save successful summaries as artifacts and list their handles and digests for the research manager"""
+    succeeded = [r for r in results if r.summary is not None]
+    duplicates = [r for r in results if r.duplicate_of is not None]
+    lines = [f"Completed {len(succeeded)} of {len(results) - len(duplicates)} searches. "
+             "Pass the search handles to write_report or revise_report."]
+    for r in results:
+        if r.duplicate_of is not None:
+            earlier = context.artifacts.find("search", label=r.duplicate_of)
+            reference = f" (see {earlier.handle})" if earlier else ""
+            lines.append(f"- SKIPPED \"{r.query}\": near-duplicate of earlier search \"{r.duplicate_of}\"{reference}")
+        elif r.summary is not None:
+            artifact = context.artifacts.put("search", r.summary, make_digest(r.summary), label=r.query)
+            context.evidence.add(artifact.handle, r.query, r.summary)
+            lines.append(f"- {artifact.handle} \"{r.query}\": {artifact.digest}")
+        else:
+            lines.append(f"- FAILED \"{r.query}\": {r.error}")
+    return "\n".join(lines)
+
+
+@function_tool
+async def perform_searches(wrapper: RunContextWrapper[ResearchContext], searches: list[WebSearchItem]) -> str:
+    """Perform several web searches concurrently. Returns a handle and short digest for each search summary.
+
+    Args:
+        searches: The searches to run, e.g. the planned searches or the evaluator's suggested searches
+    """
+    context = wrapper.context
+    budget = context.budget
+    reason = budget.exhausted(wrapper.usage.total_tokens)
+    if reason is None and budget.remaining_searches() == 0:
+        reason = f"search budget of {budget.max_searches} searches used up"
+    if reason is not None:
+        return stop_message(reason, context.artifacts)
+    # Short on budget, searches that only add breadth are dropped first, then the lowest priorities
+    wanted = searches
+    if budget.running_short(wrapper.usage.total_tokens):
+        wanted = [item for item in searches if item.priority != "low"] or searches[:1]
+    kept = {id(item) for item in by_priority(wanted)[:budget.remaining_searches()]}
+    allowed = [item for item in searches if id(item) in kept]
+    results = await run_searches(allowed, context)
+    if context.speculation is not None:
+        # Speculative searches only stand in for the first round; the rest are no longer needed
+        speculation, context.speculation = context.speculation, None
+        speculation.cancel()
+        if speculation.reused:
+            context.progress.status(f"Reused {speculation.reused} searches started while you answered the questions")
+    output = format_results(results, context)
+    if len(wanted) < len(searches):
+        output += f"\nNot run: {len(searches) - len(wanted)} low-priority searches, skipped because the research budget is running short."
+    if len(allowed) < len(wanted):
+        output += (f"\nNot run: the {len(wanted) - len(allowed)} lowest-priority searches, which exceed the search "
+                   f"budget of {budget.max_searches}.")
+    return output
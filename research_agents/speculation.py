@@ -0,0 +1,79 @@
+import asyncio
+
+from agents import Runner
+from .context import ResearchContext
+from .planner import WebSearchItem, WebSearchPlan, planner_agent, planner_input
+from .search_cache import normalize_query
+from .search_pipeline import SearchResult, run_search
+
+
+class SpeculativeSearches:
+    """Plans and runs the first round of searches for the original query while the user answers clarifying questions.
+
+    The research run later takes over the searches its own plan repeats word for word (after
+    normalization) and cancels the rest. Speculative work runs with the research run's context,
+    so it counts against the run's budget.
+    """
+
+    def __init__(self, query: str, context: ResearchContext):
+        self.query = query
+        self.context = context
+        self.reused = 0
+        self.cancelled = 0
+        self._plan: asyncio.Task | None = None
+        self._searches: dict[str, asyncio.Task] = {}
+
+    def start(self) -> None:
+        self._plan = asyncio.create_task(self._run())
+
+    async def plan(self) -> WebSearchPlan | None:
+        """Wait for the speculative plan, or return None if planning failed or was cancelled"""
+        if self._plan is None:
+            return None
+        try:
+            return await asyncio.shield(self._plan)
+        except Exception:
+            return None
+
+    def matches(self, query: str) -> bool:
+        """Whether the speculation was started for this query"""
+        return normalize_query(query) == normalize_query(self.query)
+
+    def take(self, query: str) -> asyncio.Task | None:
+        """Hand over the speculative search for exactly this query, if there is one.
+
+        Similar but different searches are not handed over: their summary would answer another question.
+        """
+        key = normalize_query(query)
+        if key not in self._searches:
+            return None
+        self.reused += 1
+        return self._searches.pop(key)
+
+    def cancel(self) -> None:
+        """Cancel the plan and every speculative search that was not taken over"""
+        if self._plan is not None and not self._plan.done():
+            self._plan.cancel()
+        for task in self._searches.values():
+            if not task.done():
+                task.cancel()
+                self.cancelled += 1
+        self._searches.clear()
+
+    async def _run(self) -> WebSearchPlan:
+        result = await Runner.run(planner_agent, planner_input(self.query, self.context.budget), context=self.context,
+                                  run_config=self.context.run_config)
+        self.context.budget.add_usage(result)
+        plan = result.final_output_as(WebSearchPlan)
+        semaphore = asyncio.Semaphore(max(1, self.context.max_concurrent_searches))
+
+        async def bounded(item: WebSearchItem) -> SearchResult:
+            async with semaphore:
+                return await run_search(item, self.context)
+
+        for item in plan.searches:
+            key = normalize_query(item.query)
+            if key not in self._searches:
+                self._searches[key] = asyncio.create_task(bounded(item))
+        return plan
+
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    """SQLite-backed cache of text values by key, with a per-entry TTL and LRU eviction.
+
+    A single instance can be shared by every research run in the process; all access
+    to the connection is serialized with a lock. Subclasses name the table and its value column.
+    """
+
+    table = "cache"
+    value_column = "value"
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"key TEXT PRIMARY KEY, query TEXT NOT NULL, {self.value_column} TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+
+    def get_entry(self, key: str) -> tuple[str, float] | None:
+        """Return the cached value for key and when it was stored, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT {self.value_column}, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0], row[1]
+
+    def put(self, key: str, query: str, value: str) -> None:
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, query, {self.value_column}, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, query, value, now, now),
+            )
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters"""
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current number of entries"""
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
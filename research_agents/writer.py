@@ -1,13 +1,16 @@
 from pydantic import BaseModel, Field
 from agents import Agent
+from .models import model_for
 
 INSTRUCTIONS = (
     "You are a senior researcher tasked with writing a cohesive report for a research query. "
-    "You will be provided with the original query, and some initial research done by a research assistant.\n"
+    "You will be provided with the original query, and passages from the research done by a research assistant, "
+    "grouped by search topic and with their source URLs.\n"
     "You should first come up with an outline for the report that describes the structure and "
     "flow of the report. Then, generate the report and return that as your final output.\n"
     "The final output should be in markdown format, and it should be lengthy and detailed. Aim "
-    "for 5-10 pages of content, at least 1000 words."
+    "for 5-10 pages of content, at least 1000 words. Cite the sources of the passages you use as "
+    "inline markdown links."
 )
 
 
@@ -22,6 +25,6 @@ class ReportData(BaseModel):
 writer_agent = Agent(
     name="WriterAgent",
     instructions=INSTRUCTIONS,
-    model="gpt-4o-mini",
+    model=model_for("writer"),
     output_type=ReportData,
 )
@@ -0,0 +1,28 @@
+from research_agents.render import markdown_to_html, render_inline
+
+
+def test_numbered_list_after_bullets_starts_a_new_list():
+    html = markdown_to_html("- a\n- b\n1. one\n2. two")
+    assert html.count("<ul>") == 1 and html.count("<ol>") == 1
+    assert html.index("</ul>") < html.index("<ol>")
+
+
+def test_nested_lists_keep_their_marker_type():
+    html = markdown_to_html("- a\n  1. n\n- c")
+    assert html.index("<ul>") < html.index("<ol>") < html.index("</ol>") < html.index("</ul>")
+
+
+def test_unsafe_link_schemes_render_as_text():
+    assert render_inline("[x](javascript:alert(1))") == "x"
+    assert "href" not in render_inline("[x](data:text/html,hi)")
+
+
+def test_safe_links_keep_parentheses_in_the_url():
+    assert render_inline("[M](https://en.wikipedia.org/wiki/Mercury_(planet)) end") == (
+        '<a href="https://en.wikipedia.org/wiki/Mercury_(planet)">M</a> end'
+    )
+    assert render_inline("[mail](mailto:a@example.com)") == '<a href="mailto:a@example.com">mail</a>'
+
+
+def test_text_and_attributes_are_escaped():
+    assert render_inline('<b> [q](https://x.org/?a="1") ') == '&lt;b&gt; <a href="https://x.org/?a=&quot;1&quot;">q</a> '
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from research_agents.progress import ProgressEvent
+from research_agents.report_cache import ReportCache, ReportFlights
+from research_agents.scheduler import JobRejected, JobScheduler
+
+REPORT = "# Report\n\n" + "A finished report that is long enough to be served from the cache. " * 3
+
+
+async def research(release: asyncio.Event, done: ProgressEvent, started: list | None = None):
+    if started is not None:
+        started.append(True)
+    yield ProgressEvent("status", "Searching")
+    await release.wait()
+    yield done
+
+
+async def collect(events) -> list:
+    return [event async for event in events]
+
+
+def join(flights: ReportFlights, scheduler: JobScheduler, session_id: str, key: str, release: asyncio.Event,
+         done: ProgressEvent | None = None, started: list | None = None):
+    done = done or ProgressEvent("done", REPORT, report=object())
+    return flights.join(
+        key, "query", session_id,
+        lambda: scheduler.submit(session_id, lambda: research(release, done, started), reserved=True),
+        admit=lambda: scheduler.reserve(session_id),
+    )
+
+
+def test_concurrent_requests_share_one_run(tmp_path):
+    async def main():
+        scheduler = JobScheduler(max_workers=2, max_jobs_per_session=1)
+        flights = ReportFlights(ReportCache(str(tmp_path)))
+        release, started = asyncio.Event(), []
+        leader = asyncio.create_task(collect(join(flights, scheduler, "a", "key", release, started=started)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(collect(join(flights, scheduler, "b", "key", release, started=started)))
+        await asyncio.sleep(0.01)
+        assert flights.has_followers("a") and not flights.has_followers("b")
+        release.set()
+        leader_events, follower_events = await leader, await follower
+        assert [e.kind for e in leader_events] == [e.kind for e in follower_events] == ["status", "done"]
+        assert len(started) == 1 and flights.coalesced == 1
+        assert flights.cache.get("key").report == REPORT
+
+    asyncio.run(main())
+
+
+def test_rejected_request_does_not_reach_other_sessions(tmp_path):
+    async def main():
+        scheduler = JobScheduler(max_workers=2, max_jobs_per_session=1)
+        flights = ReportFlights(ReportCache(str(tmp_path)))
+        release = asyncio.Event()
+        busy = asyncio.create_task(collect(join(flights, scheduler, "a", "other", release)))
+        await asyncio.sleep(0)
+        with pytest.raises(JobRejected):
+            await collect(join(flights, scheduler, "a", "key", release))
+        follower = asyncio.create_task(collect(join(flights, scheduler, "b", "key", release)))
+        await asyncio.sleep(0)
+        release.set()
+        assert [e.kind for e in await follower] == ["status", "done"]
+        await busy
+        assert not scheduler._reserved and not scheduler._sessions
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("done", [
+    ProgressEvent("done", "No report was written."),
+    ProgressEvent("done", REPORT, report=object(), partial=True),
+])
+def test_runs_without_a_finished_report_are_not_cached(tmp_path, done):
+    async def main():
+        scheduler = JobScheduler()
+        flights = ReportFlights(ReportCache(str(tmp_path)))
+        release = asyncio.Event()
+        release.set()
+        events = await collect(join(flights, scheduler, "a", "key", release, done))
+        assert events[-1] is done
+        assert flights.cache.get("key") is None
+
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from research_agents.scheduler import JobRejected, JobScheduler, QueueStatus
+
+
+async def items(release: asyncio.Event, *values):
+    await release.wait()
+    for value in values:
+        yield value
+
+
+async def collect(events) -> list:
+    return [event async for event in events]
+
+
+def test_session_limit_and_queue_limit():
+    async def main():
+        scheduler = JobScheduler(max_workers=1, max_jobs_per_session=1, max_queued_jobs=1)
+        release = asyncio.Event()
+        first = asyncio.create_task(collect(scheduler.submit("a", lambda: items(release, 1))))
+        await asyncio.sleep(0)
+        with pytest.raises(JobRejected, match="already have"):
+            await collect(scheduler.submit("a", lambda: items(release, 2)))
+        second = asyncio.create_task(collect(scheduler.submit("b", lambda: items(release, 2))))
+        await asyncio.sleep(0)
+        with pytest.raises(JobRejected, match="queue is full"):
+            await collect(scheduler.submit("c", lambda: items(release, 3)))
+        release.set()
+        assert await first == [1]
+        result = await second
+        assert isinstance(result[0], QueueStatus) and result[0].position == 1
+        assert result[-1] == 2
+        assert scheduler.running == 0 and not scheduler._sessions
+
+    asyncio.run(main())
+
+
+def test_reservations_count_until_submitted():
+    async def main():
+        scheduler = JobScheduler(max_workers=1, max_jobs_per_session=2, max_queued_jobs=0)
+        scheduler.reserve("a")
+        with pytest.raises(JobRejected):
+            scheduler.reserve("b")
+        release = asyncio.Event()
+        release.set()
+        assert await collect(scheduler.submit("a", lambda: items(release, 1), reserved=True)) == [1]
+        assert not scheduler._reserved
+        scheduler.reserve("b")
+
+    asyncio.run(main())